@@ -32,7 +32,13 @@ if __name__ == "__main__":
 
             width, height = img.size
 
-            for dpi, ratio in MANIFEST:
-                cimg = img.clone()
-                cimg.resize(int(width*ratio), int(height*ratio))
-                cimg.save(filename="res/drawable-%sdpi/%s" % (dpi, filename))
+            # Variants are made progressively from the largest one,
+            # so the full size image is filtered only once.
+            variants = img.make_variants([
+                (int(width*ratio), int(height*ratio))
+                for dpi, ratio in MANIFEST
+            ])
+            for (dpi, ratio), cimg in zip(MANIFEST, variants):
+                with cimg:
+                    cimg.save(filename="res/drawable-%sdpi/%s" %
+                              (dpi, filename))
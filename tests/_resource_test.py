@@ -6,6 +6,8 @@
 # discovers tests just using filenames.  Fortuneately, it seems to run
 # tests in lexicographical order, so we simply adds underscore to
 # the beginning of the filename.
+import threading
+
 from pytest import mark, raises
 
 from wand import exceptions, resource
@@ -51,6 +53,27 @@ def test_negative_refcount():
         resource.decrement_refcount()
 
 
+@mark.slow
+def test_refcount_threads():
+    """Refcount is consistent even if it's changed on several threads."""
+    errors = []
+
+    def work():
+        try:
+            for _ in range(1000):
+                resource.increment_refcount()
+                resource.decrement_refcount()
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert resource.reference_count == 0
+
+
 class DummyResource(resource.Resource):
 
     def set_exception_type(self, idx):
@@ -76,3 +99,48 @@ def test_raises_exceptions(recwarn, code):
         assert w.category.__name__.endswith('Warning')
         assert "Dummy exception" in str(w.message)
         assert recwarn.list == []
+
+
+def test_limits():
+    """Resource limits can be set, and restored to defaults."""
+    default = resource.limits['memory']
+    resource.limits['memory'] = 64 * 1024 * 1024
+    try:
+        assert resource.limits['memory'] == 64 * 1024 * 1024
+        assert resource.limits.usage('memory') >= 0
+    finally:
+        del resource.limits['memory']
+    assert resource.limits['memory'] == default
+    with raises(KeyError):
+        del resource.limits['memory']
+
+
+def test_limits_survive_terminus():
+    """Limits are restored when the MagickWand API is instantiated again."""
+    resource.limits['thread'] = 1
+    try:
+        assert resource.reference_count == 0
+        assert resource.limits['thread'] == 1
+    finally:
+        del resource.limits['thread']
+
+
+def test_limits_scope():
+    default = resource.limits['disk']
+    with resource.limits.scope(disk=1024 * 1024, area=1024):
+        assert resource.limits['disk'] == 1024 * 1024
+        assert resource.limits['area'] == 1024
+    assert resource.limits['disk'] == default
+
+
+def test_limits_errors():
+    assert 'memory' in resource.limits
+    assert 'undefined' not in resource.limits
+    with raises(KeyError):
+        resource.limits['nonexistent']
+    with raises(TypeError):
+        resource.limits[1]
+    with raises(TypeError):
+        resource.limits['memory'] = '1MB'
+    with raises(ValueError):
+        resource.limits['memory'] = -1
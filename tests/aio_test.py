@@ -0,0 +1,78 @@
+import asyncio
+
+from pytest import raises
+
+from wand.aio import AsyncImage, Runner
+from wand.image import Image
+
+
+def run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def test_async_image(fx_asset):
+    filename = str(fx_asset.join('mona-lisa.jpg'))
+
+    async def convert():
+        async with await AsyncImage.open(filename=filename) as img:
+            assert img.image.size == (402, 599)
+            await img.transform().resize(100, 150).rotate(90)
+            return await img.make_blob('png')
+    blob = run(convert())
+    with Image(blob=blob) as img:
+        assert img.format == 'PNG'
+        assert img.size == (150, 100)
+
+
+def test_async_image_concurrency(fx_asset, tmpdir):
+    filename = str(fx_asset.join('mona-lisa.jpg'))
+    runner = Runner(workers=2, concurrency=2)
+
+    async def thumbnail(i):
+        img = AsyncImage(runner=runner)
+        try:
+            await img.read(filename=filename)
+            await img.transform().thumbnail(50, 50)
+            await img.save(filename=str(tmpdir.join('{0}.png'.format(i))))
+        finally:
+            await img.close()
+    try:
+        run(asyncio.gather(*[thumbnail(i) for i in range(8)]))
+    finally:
+        runner.shutdown()
+    for i in range(8):
+        with Image(filename=str(tmpdir.join('{0}.png'.format(i)))) as img:
+            assert img.size == (34, 50)
+
+
+def test_async_image_event_loops(fx_asset):
+    filename = str(fx_asset.join('mona-lisa.jpg'))
+    runner = Runner(workers=1)
+    img = AsyncImage(runner=runner)
+
+    async def size():
+        await img.read(filename=filename)
+        return await img.call(lambda: img.image.size)
+    try:
+        # The runner and the image are used from more than one event loop.
+        for _ in range(2):
+            loop = asyncio.new_event_loop()
+            try:
+                assert loop.run_until_complete(size()) == (402, 599)
+            finally:
+                loop.close()
+    finally:
+        img.image.close()
+        runner.shutdown()
+
+
+def test_transform_chain_errors():
+    async def chain():
+        async with AsyncImage() as img:
+            with raises(AttributeError):
+                img.transform().nonexistent_method()
+            with raises(AttributeError):
+                img.transform()._private
+    run(chain())
+    with raises(TypeError):
+        AsyncImage(image='not an image')
@@ -0,0 +1,78 @@
+import os
+
+from pytest import raises
+
+from wand.batch import BatchResult, map_images
+from wand.image import Image
+
+
+def get_size(img):
+    return img.size
+
+
+def crash_on_beach(img):
+    if img.size != (402, 599):
+        os._exit(1)
+    return img.size
+
+
+def to_png(img):
+    img.resize(10, 10)
+    return img.make_blob('png')
+
+
+def test_map_images(fx_asset):
+    filenames = [str(fx_asset.join('mona-lisa.jpg')),
+                 str(fx_asset.join('nonexistent.jpg')),
+                 str(fx_asset.join('beach.jpg'))]
+    results = list(map_images(get_size, filenames, workers=2))
+    assert [r.input for r in results] == filenames
+    assert all(isinstance(r, BatchResult) for r in results)
+    assert results[0] == (filenames[0], (402, 599), None)
+    assert results[1].value is None
+    assert isinstance(results[1].error, Exception)
+    assert results[2].error is None
+    with Image(filename=filenames[2]) as img:
+        assert results[2].value == img.size
+
+
+def test_map_images_blobs(fx_asset):
+    with open(str(fx_asset.join('mona-lisa.jpg')), 'rb') as f:
+        blob = f.read()
+    inputs = [{'blob': blob}] * 3
+    results = list(map_images(to_png, inputs, workers=2, ordered=False,
+                              limits={'thread': 1}))
+    assert len(results) == 3
+    for result in results:
+        assert result.error is None
+        with Image(blob=result.value) as img:
+            assert img.format == 'PNG'
+            assert img.size == (10, 10)
+
+
+def test_map_images_worker_crash(fx_asset):
+    filenames = [str(fx_asset.join('mona-lisa.jpg')),
+                 str(fx_asset.join('beach.jpg')),
+                 str(fx_asset.join('mona-lisa.jpg'))]
+    results = list(map_images(crash_on_beach, filenames, workers=2))
+    assert [r.input for r in results] == filenames
+    assert results[0] == (filenames[0], (402, 599), None)
+    assert results[1].value is None
+    assert results[1].error is not None
+    assert results[2] == (filenames[2], (402, 599), None)
+
+
+def test_map_images_errors():
+    with raises(TypeError):
+        map_images('not callable', [])
+    with raises(TypeError):
+        map_images(get_size, [], workers=0)
+    with raises(TypeError):
+        map_images(get_size, [], chunksize=0)
+    # Invalid limits fail before any worker process starts.
+    with raises(KeyError):
+        map_images(get_size, [], limits={'memroy': 1024})
+    with raises(TypeError):
+        map_images(get_size, [], limits={'memory': 'much'})
+    with raises(ValueError):
+        map_images(get_size, [], limits={'memory': -1})
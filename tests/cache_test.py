@@ -0,0 +1,75 @@
+from pytest import raises
+
+from wand.cache import DirectoryStore, MemoryStore, TransformCache
+from wand.image import Image
+
+
+def test_memory_store():
+    store = MemoryStore(10)
+    store.set('a', b'1234')
+    store.set('b', b'1234')
+    assert store.get('a') == b'1234'
+    store.set('c', b'1234')  # evicts b, the least recently used
+    assert store.get('b') is None
+    assert store.get('a') == b'1234'
+    assert store.get('c') == b'1234'
+    assert store.size == 8
+    store.set('d', b'12345678901')  # too large to store
+    assert store.get('d') is None
+    assert len(store) == 2
+    with raises(ValueError):
+        MemoryStore(-1)
+
+
+def test_directory_store(tmpdir):
+    store = DirectoryStore(str(tmpdir.join('cache')))
+    assert store.get('abcdef') is None
+    store.set('abcdef', b'blob')
+    assert store.get('abcdef') == b'blob'
+    store.set('abcdef', b'new blob')
+    assert store.get('abcdef') == b'new blob'
+    assert tmpdir.join('cache', 'ab', 'cdef').check()
+
+
+def test_cached(fx_asset):
+    cache = TransformCache(MemoryStore(1024 * 1024))
+    calls = []
+
+    @cache.cached(format='png')
+    def resize(img, width, height):
+        calls.append((width, height))
+        img.resize(width, height)
+
+    with open(str(fx_asset.join('mona-lisa.jpg')), 'rb') as f:
+        source = f.read()
+    blob = resize(source, 10, 20)
+    assert resize(source, 10, 20) == blob
+    assert calls == [(10, 20)]
+    with Image(blob=blob) as img:
+        assert img.format == 'PNG'
+        assert img.size == (10, 20)
+    resize(source, 20, 10)
+    assert calls == [(10, 20), (20, 10)]
+    with Image(blob=source) as img:
+        resize(img, 10, 20)  # keyed by the signature instead
+        assert len(calls) == 3
+        resize(img, 10, 20)
+        assert len(calls) == 3
+
+
+def test_render(fx_asset, tmpdir):
+    cache = TransformCache(DirectoryStore(str(tmpdir)))
+    with open(str(fx_asset.join('mona-lisa.jpg')), 'rb') as f:
+        source = f.read()
+    operations = [('resize', (), {'width': 20, 'height': 30}),
+                  ('flip', (), {})]
+    blob = cache.render(source, operations, format='png')
+    key = cache.key(source, [('resize', (), [('height', 30), ('width', 20)]),
+                             ('flip', (), [])], 'png')
+    assert cache.store.get(key) == blob
+    with Image(blob=blob) as img:
+        assert img.size == (20, 30)
+    with raises(TypeError):
+        TransformCache('not a store')
+    with raises(TypeError):
+        cache.key(123, [])
@@ -6,7 +6,7 @@ from pytest import mark
 
 from wand.color import Color
 from wand.compat import xrange
-from wand.version import MAGICK_VERSION_INFO  # noqa
+from wand.version import QUANTUM_RANGE, MAGICK_VERSION_INFO  # noqa
 
 
 def test_equals():
@@ -34,6 +34,25 @@ def test_hash():
     assert hash(Color('rgba(0, 0, 0, 0))')) == hash(Color('rgba(1, 1, 1, 0))'))
 
 
+def test_channels_without_resource(monkeypatch):
+    """Channels, equality and hash don't allocate PixelWand."""
+    a = Color('rgba(255, 0, 0, 0.5)')
+    b = Color('rgba(100%, 0%, 0%, 0.5)')
+
+    def fail(self):
+        raise AssertionError('PixelWand is allocated')
+    monkeypatch.setattr(Color, '__enter__', fail)
+    assert a.red == 1.0 and a.green == 0.0 and a.blue == 0.0
+    assert 0.49 < a.alpha < 0.51
+    assert a.red_quantum == QUANTUM_RANGE
+    assert a.green_quantum == 0
+    assert a.red_int8 == 255
+    assert a == b
+    assert hash(a) == hash(b)
+    assert a.quantized() == b.quantized()
+    assert Color('transparent').quantized() is None
+
+
 def test_red():
     assert Color('black').red == 0
     assert Color('red').red == 1
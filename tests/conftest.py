@@ -2,6 +2,7 @@ import base64
 import inspect
 import json
 import os
+import sys
 try:
     from urllib import parse as urllib, request as urllib2
 except ImportError:
@@ -15,6 +16,15 @@ from wand.display import display as display_fn
 from wand.image import Image
 
 
+# wand.aio uses the async/await syntax of Python 3.5, and wand.batch
+# depends on concurrent.futures of Python 3.3.
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore.append('aio_test.py')
+if sys.version_info < (3, 3):
+    collect_ignore.append('batch_test.py')
+
+
 def pytest_addoption(parser):
     parser.addoption('--skip-slow', action='store_true',
                      help='Skip slow tests')
@@ -1,21 +1,34 @@
 # -*- coding: utf-8 -*-
 import codecs
+import ctypes
 import io
+import mmap
 import os
 import os.path
 import shutil
 import struct
 import sys
 import tempfile
+import threading
 import warnings
 
 from pytest import mark, raises
 
-from wand.image import ClosedImageError, Image, IMAGE_LAYER_METHOD
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from wand.image import (ClosedImageError, Image, IMAGE_LAYER_METHOD,
+                        PingedImageError, iter_frames)
+from wand.api import library
 from wand.color import Color
 from wand.compat import PY3, string_type, text, text_type
-from wand.exceptions import OptionError, MissingDelegateError
+from wand.exceptions import (MissingDelegateError, OptionError,
+                             WandLibraryVersionError)
 from wand.font import Font
+from wand.index import hamming_distance
+from wand.version import QUANTUM_DEPTH
 
 try:
     filesystem_encoding = sys.getfilesystemencoding()
@@ -170,6 +183,34 @@ def test_new_from_blob(fx_asset):
         img.wand
 
 
+def test_new_from_buffer(fx_asset):
+    blob = fx_asset.join('mona-lisa.jpg').read('rb')
+    buffers = [bytearray(blob), [blob[:10], blob[10:]]]
+    if sys.version_info >= (2, 7):  # Python 2.6 has no memoryview
+        buffers.append(memoryview(blob))
+    for buffer in buffers:
+        with Image(blob=buffer) as img:
+            assert img.size == (402, 599)
+    filename = str(fx_asset.join('mona-lisa.jpg'))
+    with open(filename, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        try:
+            with Image(blob=mapped) as img:
+                assert img.size == (402, 599)
+        finally:
+            mapped.close()  # fails if the buffer is still exported
+
+
+def test_new_from_mmap(fx_asset):
+    filename = str(fx_asset.join('mona-lisa.jpg'))
+    with Image(filename=filename, use_mmap=True) as img:
+        assert img.size == (402, 599)
+        assert img.format == 'JPEG'
+    with Image(filename=str(fx_asset.join('google.ico')),
+               use_mmap=True) as img:
+        assert img.size == (16, 16)
+
+
 def test_new_with_format(fx_asset):
     blob = fx_asset.join('google.ico').read('rb')
     with raises(Exception):
@@ -292,6 +333,103 @@ def test_make_blob(fx_asset):
         assert img.format == 'PNG'
 
 
+def test_make_blob_without_copy(fx_asset):
+    with Image(filename=str(fx_asset.join('mona-lisa.jpg'))) as img:
+        blob = img.make_blob('png')
+        view = img.make_blob('png', copy=False)
+        assert len(view) == len(blob)
+        # It's a buffer object on Python 2.6, which lacks memoryview.
+        assert bytearray(view) == blob
+        with Image(blob=bytearray(view)) as img2:
+            assert img2.size == (402, 599)
+        buffer = io.BytesIO()
+        buffer.write(view)
+        assert buffer.getvalue() == blob
+        del view
+
+
+def test_ping_filename(fx_asset):
+    with Image.ping(filename=str(fx_asset.join('mona-lisa.jpg'))) as img:
+        assert img.pinged
+        assert img.size == (402, 599)
+        assert img.format == 'JPEG'
+        assert img.mimetype in ('image/jpeg', 'image/x-jpeg')
+        assert len(img.sequence) == 1
+        with raises(PingedImageError):
+            img.resize(10, 10)
+        with raises(PingedImageError):
+            img.make_blob('png')
+        with raises(PingedImageError):
+            img.export_pixels()
+        with raises(PingedImageError):
+            iter(img)
+        with img.clone() as cloned:
+            assert cloned.pinged
+            with raises(PingedImageError):
+                cloned.flip()
+            assert img != cloned
+        assert img == img
+        assert len(set([img, img])) == 1
+
+
+def test_ping_blob(fx_asset):
+    filename = str(fx_asset.join('nocomments.gif'))
+    with open(filename, 'rb') as f:
+        blob = f.read()
+    with Image(filename=filename) as expected:
+        with Image.ping(blob=blob) as img:
+            assert img.size == expected.size
+            assert img.format == 'GIF'
+            assert len(img.sequence) == len(expected.sequence)
+            with img.sequence[0] as frame:
+                assert frame.pinged
+    with raises(TypeError):
+        Image.ping()
+    with raises(TypeError):
+        Image.ping(blob=blob, filename=filename)
+
+
+def test_iter_frames(fx_asset):
+    filename = str(fx_asset.join('apple.ico'))
+    expected = [(32, 32), (16, 16), (32, 32), (16, 16)]
+    sizes = []
+    for frame in iter_frames(filename=filename):
+        assert len(frame.sequence) == 1
+        sizes.append(frame.size)
+    assert sizes == expected
+    with open(filename, 'rb') as f:
+        blob = f.read()
+    assert [frame.size for frame in iter_frames(blob=blob)] == expected
+    with open(filename, 'rb') as f:
+        frames = iter_frames(file=f, format='ico')
+        assert [frame.size for frame in frames] == expected
+    # Arguments are checked when it's called, not when it's iterated.
+    with raises(TypeError):
+        iter_frames()
+    with raises(TypeError):
+        iter_frames(filename=filename, format=123)
+
+
+def test_decode_hint(fx_asset):
+    filename = str(fx_asset.join('tiger_hd-1920x1080.jpg'))
+    with Image(filename=filename, decode_hint=(200, 100)) as img:
+        assert 200 <= img.width < 1920
+        assert 100 <= img.height < 1080
+        img.read(filename=filename)
+        assert img.sequence[1].size == (1920, 1080)
+    with open(filename, 'rb') as f:
+        with Image(blob=f.read(), decode_hint=(960, 540)) as img:
+            assert img.size == (960, 540)
+    with raises(TypeError):
+        Image(filename=filename, decode_hint=200)
+    with raises(TypeError):
+        Image(width=10, height=10, decode_hint=(200, 100))
+    with Image() as img:
+        library.MagickSetOption(img.wand, b'jpeg:size', b'400x300')
+        img.read(filename=filename, decode_hint=(200, 100))
+        assert library.MagickGetOption(img.wand, b'jpeg:size') == b'400x300'
+
+
 def test_size(fx_asset):
     """Gets the image size."""
     with Image(filename=str(fx_asset.join('mona-lisa.jpg'))) as img:
@@ -595,6 +733,24 @@ def test_index_pixel(fx_asset):
         assert img[-201, -201] == Color('transparent')
 
 
+def test_get_pixels(fx_asset):
+    with Image(filename=str(fx_asset.join('croptest.png'))) as img:
+        assert img.get_pixel(150, 150) == Color('black')
+        assert img.get_pixel(-1, -1) == Color('transparent')
+        points = [(0, 0), (100, 100), (199, 199), (200, 200), (-200, -200)]
+        assert img.get_pixels(points) == [
+            Color('transparent'), Color('black'), Color('black'),
+            Color('transparent'), Color('black')
+        ]
+        assert img.get_pixels([]) == []
+        with raises(IndexError):
+            img.get_pixel(300, 0)
+        with raises(IndexError):
+            img.get_pixels([(0, 0), (0, -301)])
+        with raises(TypeError):
+            img.get_pixel(1.5, 0)
+
+
 def test_index_row(fx_asset):
     """Gets a row."""
     with Color('transparent') as transparent:
@@ -623,6 +779,122 @@ def test_index_row(fx_asset):
                     assert c == transparent
 
 
+def test_export_pixels(fx_asset):
+    with Image(filename=str(fx_asset.join('croptest.png'))) as img:
+        pixels = img.export_pixels(channel_map='RGBA', storage='char')
+        assert isinstance(pixels, bytearray)
+        assert len(pixels) == 300 * 300 * 4
+        assert pixels[:4] == bytearray(b'\x00\x00\x00\x00')
+        offset = (150 * 300 + 150) * 4
+        assert pixels[offset:offset + 4] == bytearray(b'\x00\x00\x00\xff')
+        region = img.export_pixels(100, 100, 10, 10, 'RGB', 'short')
+        assert len(region) == 10 * 10 * 3 * 2
+        assert region == bytearray(len(region))
+        with raises(ValueError):
+            img.export_pixels(290, 290, 20, 20)
+        with raises(ValueError):
+            img.export_pixels(channel_map='RGBX')
+        with raises(ValueError):
+            img.export_pixels(storage='quantum')
+        with raises(TypeError):
+            img.export_pixels(channel_map=1)
+
+
+def test_iter_rows(fx_asset):
+    with Image(filename=str(fx_asset.join('croptest.png'))) as img:
+        rows = list(img.iter_rows(channel_map='A'))
+        assert len(rows) == 300
+        assert all(len(row) == 300 for row in rows)
+        opaque = [y for y, row in enumerate(rows) if any(row)]
+        assert (opaque[0], opaque[-1]) == (100, 199)
+        assert rows[150] == img.export_pixels(0, 150, 300, 1, 'A')
+        rows = img.iter_rows('RGB', 'short')
+        assert len(next(rows)) == 300 * 3 * 2
+        with raises(ValueError):
+            img.iter_rows(channel_map='RGBX')
+
+
+def test_import_pixels():
+    with Image(width=4, height=2, background=Color('black')) as img:
+        img.import_pixels(b'\xff\x00\x00' * 4, 0, 0, 4, 1, 'RGB')
+        assert img[0, 0] == Color('red')
+        assert img[3, 0] == Color('red')
+        assert img[0, 1] == Color('black')
+        blue = bytearray(b'\x00\x00\xff' * 8)
+        img.import_pixels(blue, channel_map='RGB')
+        assert img[2, 1] == Color('blue')
+        assert img.export_pixels(channel_map='RGB') == blue
+        with raises(ValueError):
+            img.import_pixels(b'\x00\x00', channel_map='RGB')
+
+
+def test_region():
+    with Image(width=4, height=4, background=Color('black')) as img:
+        with img.region(1, 1, 2, 2, channel_map='RGB',
+                        storage='char') as pixels:
+            assert len(pixels) == 2 * 2 * 3
+            for i in range(0, len(pixels), 3):
+                pixels[i] = 0xff
+        assert img[1, 1] == img[2, 2] == Color('red')
+        assert img[0, 0] == img[3, 3] == Color('black')
+        assert img.dirty
+        with img.region(channel_map='R', writable=False) as pixels:
+            pixels[:] = bytearray(len(pixels))
+        assert img[1, 1] == Color('red')
+        with raises(ZeroDivisionError):
+            with img.region(channel_map='R') as pixels:
+                pixels[:] = bytearray(len(pixels))
+                1 / 0
+        assert img[1, 1] == Color('red')
+
+
+@mark.skipif(QUANTUM_DEPTH < 16, reason='needs a 16-bit quantum')
+def test_region_16bit():
+    data = struct.pack('=2H', 0x1234, 0xfedc)
+    with Image(width=2, height=1, background=Color('black')) as img:
+        img.depth = 16
+        img.import_pixels(bytearray(data), channel_map='R', storage='short')
+        # The region which isn't changed doesn't lose the lower 8 bits.
+        with img.region(channel_map='R'):
+            pass
+        assert bytes(img.export_pixels(channel_map='R',
+                                       storage='short')) == data
+
+
+@mark.skipif(numpy is None, reason='numpy is not installed')
+def test_array_interface(fx_asset):
+    with Image(filename=str(fx_asset.join('croptest.png'))) as img:
+        array = numpy.asarray(img)
+        assert array.shape == (300, 300, 4)
+        assert array.dtype == numpy.uint8
+        assert list(array[0, 0]) == [0, 0, 0, 0]
+        assert list(array[150, 150]) == [0, 0, 0, 255]
+
+
+@mark.skipif(numpy is None, reason='numpy is not installed')
+def test_from_array():
+    array = numpy.zeros((10, 20, 3), dtype=numpy.uint8)
+    array[5, :] = (255, 0, 0)
+    with Image.from_array(array) as img:
+        assert img.size == (20, 10)
+        assert img[0, 0] == Color('black')
+        assert img[3, 5] == Color('red')
+        assert (numpy.asarray(img)[:, :, :3] == array).all()
+    with Image.from_array(numpy.zeros((4, 4), dtype=numpy.uint16)) as img:
+        assert img.size == (4, 4)
+        assert img.depth == 16
+    with raises(ValueError):
+        Image.from_array(array[:, ::2])
+    with raises(ValueError):
+        Image.from_array(array, channel_map='RGBA')
+    with raises(ValueError):
+        Image.from_array(numpy.zeros((2, 2, 2, 2), dtype=numpy.uint8))
+    with raises(ValueError):
+        Image.from_array(numpy.zeros((2, 2, 0), dtype=numpy.uint8))
+    with raises(TypeError):
+        Image.from_array([[0, 0], [0, 0]])
+
+
 def test_slice_crop(fx_asset):
     """Crops using slicing."""
     with Image(filename=str(fx_asset.join('croptest.png'))) as img:
@@ -777,6 +1049,59 @@ def test_resize_and_sample(method, fx_asset):
             assert c.size == (100, 599)
 
 
+@mark.parametrize('optimize', [True, False])
+def test_map_frames(optimize, tmpdir, fx_asset):
+    def resize(frame):
+        # Each frame is split alone out of the list.
+        assert library.MagickGetNumberImages(frame.wand) == 1
+        frame.resize(175, 98)
+    with Image(filename=str(fx_asset.join('nocomments-delay-100.gif'))) as img:
+        first = img.sequence[0]
+        img.map_frames(resize, workers=4, optimize=optimize)
+        assert len(img.sequence) == 46
+        # Frames accessed before are not reused for the new frames.
+        assert img.sequence[0] is not first
+        assert img.sequence[0].size == (175, 98)
+        for s in img.sequence:
+            assert s.delay == 100
+        img.save(filename=str(tmpdir.join('map_frames.gif')))
+    with Image(filename=str(tmpdir.join('map_frames.gif'))) as img:
+        assert len(img.sequence) == 46
+        assert img.size == (175, 98)
+
+
+def test_optimize_layers(fx_asset):
+    with Image(filename=str(fx_asset.join('nocomments-delay-100.gif'))) as img:
+        img.resize(175, 98)
+        plain = img.make_blob('gif')
+        optimized = img.make_blob('gif', optimize=True)
+        assert len(optimized) < len(plain)
+        assert len(img.sequence) == 46
+        with img.optimized() as copy:
+            assert len(copy.sequence) == 46
+            assert copy.size == (175, 98)
+            for s in copy.sequence:
+                assert s.delay == 100
+        img.optimize_layers()
+        try:
+            img.optimize_transparency()
+        except WandLibraryVersionError:
+            pass
+        assert len(img.sequence) == 46
+
+
+def test_map_frames_error(fx_asset):
+    def fail(frame):
+        raise ValueError('failed')
+    with Image(filename=str(fx_asset.join('nocomments.gif'))) as img:
+        length = len(img.sequence)
+        with raises(ValueError):
+            img.map_frames(fail)
+        assert len(img.sequence) == length
+        with raises(TypeError):
+            img.map_frames(None)
+
+
 @mark.slow
 @mark.parametrize(('method'), [
     ('resize'),
@@ -843,6 +1168,60 @@ def test_resize_and_sample_errors(method, fx_asset):
             getattr(img, method)(height=-5)
 
 
+def test_thumbnail(fx_asset):
+    with Image(filename=str(fx_asset.join('mona-lisa.jpg'))) as img:
+        with img.clone() as a:
+            a.thumbnail(100, 100)
+            assert a.size == (67, 100)
+        with img.clone() as a:
+            a.thumbnail(width=201)
+            assert a.size == (201, 300)
+        with img.clone() as a:
+            a.thumbnail(1000, 1000)
+            assert a.size == (402, 599)
+        with raises(TypeError):
+            img.thumbnail()
+        with raises(TypeError):
+            img.thumbnail(width='100')
+        with raises(ValueError):
+            img.thumbnail(height=0)
+
+
+def test_make_variants(fx_asset):
+    with Image(filename=str(fx_asset.join('mona-lisa.jpg'))) as img:
+        sizes = [(100, 100), (None, 300), (201, None)]
+        variants = img.make_variants(sizes)
+        try:
+            assert [v.size for v in variants] == [(67, 100), (201, 300),
+                                                  (201, 300)]
+        finally:
+            for variant in variants:
+                variant.close()
+        assert img.size == (402, 599)
+
+
+@mark.slow
+def test_resize_threads(fx_asset):
+    """Images can be read, resized, and destroyed on several threads."""
+    filename = str(fx_asset.join('mona-lisa.jpg'))
+    with Image(filename=filename) as img:
+        img.resize(100, 150)
+        expected = img.signature
+    results = []
+
+    def work():
+        for _ in range(10):
+            with Image(filename=filename) as img:
+                img.resize(100, 150)
+                results.append(img.signature)
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [expected] * 80
+
+
 @mark.parametrize(('args', 'kwargs', 'expected_size'), [
     ((), {'resize': '200%'}, (1600, 1200)),
     ((), {'resize': '200%x100%'}, (1600, 600)),
@@ -1122,6 +1501,19 @@ def test_channel_depths(fx_asset):
         }
 
 
+def test_statistics(fx_asset):
+    with Image(filename=str(fx_asset.join('trim-color-test.png'))) as i:
+        stats = i.statistics
+        assert list(stats) == ['red', 'green', 'blue', 'composite_channels']
+        assert stats['red'].maxima == 0
+        assert stats['green'].minima == 0
+        assert stats['green'].maxima == stats['blue'].maxima
+        assert stats['green'].mean == stats['blue'].mean
+        assert stats['gray'].mean == stats['red'].mean
+        with raises(KeyError):
+            stats['alpha']
+
+
 def test_channel_images(fx_asset):
     with Image(filename=str(fx_asset.join('sasha.jpg'))) as i:
         i.format = 'png'
@@ -1192,6 +1584,26 @@ def test_compare(fx_asset):
             cmp_img, err = orig.compare(img, 'root_mean_square')
 
 
+def test_dhash_phash(fx_asset):
+    with Image(filename=str(fx_asset.join('beach.jpg'))) as orig:
+        with Image(filename=str(fx_asset.join('watermark_beach.jpg'))) as img:
+            with Image(filename=str(fx_asset.join('mona-lisa.jpg'))) as other:
+                for method in 'dhash', 'phash':
+                    hash_ = getattr(orig, method)()
+                    assert 0 <= hash_ < 2 ** 64
+                    with orig.clone() as resized:
+                        resized.resize(orig.width // 2, orig.height // 2)
+                        near = getattr(resized, method)()
+                    assert hamming_distance(hash_, near) <= 6
+                    similar = getattr(img, method)()
+                    different = getattr(other, method)()
+                    assert (hamming_distance(hash_, similar) <
+                            hamming_distance(hash_, different))
+        assert orig.dhash(4) < 2 ** 16
+        with raises(ValueError):
+            orig.phash(0)
+
+
 def test_liquid_rescale(fx_asset):
     def assert_equal_except_alpha(a, b):
         with a:
@@ -1723,6 +2135,16 @@ def test_histogram(fx_asset):
         assert h[Color('srgb(0,0,255)')] == 5000
 
 
+def test_histogram_as_arrays(fx_asset):
+    with Image(filename=str(fx_asset.join('trim-color-test.png'))) as a:
+        colors, counts = a.histogram.as_arrays()
+        assert len(colors) == 8
+        assert list(counts) == [5000, 5000]
+        assert counts.itemsize == ctypes.sizeof(ctypes.c_size_t)
+        rgba = sorted(tuple(colors[i:i + 4]) for i in range(0, 8, 4))
+        assert rgba == [(0.0, 0.0, 1.0, 1.0), (0.0, 1.0, 0.0, 1.0)]
+
+
 def test_gaussian_blur(fx_asset, display):
     with Image(filename=str(fx_asset.join('sasha.jpg'))) as img:
         before = img[100, 100]
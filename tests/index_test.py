@@ -0,0 +1,54 @@
+import random
+
+from pytest import raises
+
+from wand.index import HashIndex, hamming_distance
+
+
+def test_hamming_distance():
+    assert hamming_distance(0, 0) == 0
+    assert hamming_distance(0b1011, 0b0001) == 2
+    assert hamming_distance(2 ** 64 - 1, 0) == 64
+    with raises(ValueError):
+        hamming_distance(-1, 0)
+    with raises(TypeError):
+        hamming_distance(0, 1.5)
+
+
+def test_hash_index():
+    index = HashIndex()
+    assert index.search(0, 10) == []
+    index.add(0b0000, 'a')
+    index.add(0b0001, 'b')
+    index.add(0b0011, 'c')
+    index.add(0b1111, 'd')
+    index.add(0b0001, 'e')
+    assert len(index) == 5
+    assert index.search(0b0000, 0) == [(0, 0b0000, 'a')]
+    assert index.search(0b0000, 1) == [
+        (0, 0b0000, 'a'), (1, 0b0001, 'b'), (1, 0b0001, 'e')
+    ]
+    assert [value for _, _, value in index.search(0b0111, 1)] == ['c', 'd']
+    with raises(ValueError):
+        index.add(-1)
+    with raises(TypeError):
+        index.add('0')
+    with raises(ValueError):
+        index.search(-1, 1)
+    # The rejected hashes aren't counted.
+    assert len(index) == 5
+    with raises(TypeError):
+        index.search(0, 1.5)
+
+
+def test_hash_index_random():
+    rng = random.Random(1234)
+    hashes = [rng.getrandbits(64) for _ in range(500)]
+    index = HashIndex()
+    for i, hash_ in enumerate(hashes):
+        index.add(hash_, i)
+    query = hashes[0] ^ 0b101
+    expected = sorted((hamming_distance(query, h), h, i)
+                      for i, h in enumerate(hashes)
+                      if hamming_distance(query, h) <= 20)
+    assert index.search(query, 20) == expected
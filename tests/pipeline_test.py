@@ -0,0 +1,70 @@
+from pytest import raises
+
+from wand.image import Image
+from wand.pipeline import Pipeline
+
+
+def optimize(pipeline, size):
+    return [(name, dict((k, v) for k, v in kwargs.items()
+                        if k in ('left', 'top', 'width', 'height')))
+            for name, _, kwargs in pipeline.optimize(pipeline.operations,
+                                                     size)]
+
+
+def test_optimize_resize():
+    with Image(width=10, height=10) as img:
+        p = img.pipeline().resize(400, 300).resize(200, 150).strip().strip()
+        assert optimize(p, (800, 600)) == [
+            ('strip', {}),
+            ('resize', {'width': 200, 'height': 150})
+        ]
+        p = img.pipeline().sample(400, 300).resize(200, 150)
+        assert optimize(p, (800, 600)) == [
+            ('sample', {'width': 400, 'height': 300}),
+            ('resize', {'width': 200, 'height': 150})
+        ]
+
+
+def test_optimize_crop():
+    with Image(width=10, height=10) as img:
+        p = img.pipeline().crop(10, 20, width=300, height=200) \
+                          .crop(5, 5, width=100, height=100)
+        assert optimize(p, (800, 600)) == [
+            ('crop', {'left': 15, 'top': 25, 'width': 100, 'height': 100})
+        ]
+        p = img.pipeline().resize(400, 300).crop(100, 50, 300, 200)
+        assert optimize(p, (800, 600)) == [
+            ('crop', {'left': 200, 'top': 100, 'width': 400, 'height': 300}),
+            ('resize', {'width': 200, 'height': 150})
+        ]
+        # not exactly mappable
+        p = img.pipeline().resize(400, 300).crop(1, 1, width=100, height=100)
+        assert optimize(p, (801, 600)) == [
+            ('resize', {'width': 400, 'height': 300}),
+            ('crop', {'left': 1, 'top': 1, 'width': 100, 'height': 100})
+        ]
+        # invalid arguments are left as they are
+        p = img.pipeline().resize(400, 300).crop(500, 0)
+        assert optimize(p, (800, 600)) == [
+            ('resize', {'width': 400, 'height': 300}),
+            ('crop', {'left': 500, 'top': 0, 'width': None, 'height': None})
+        ]
+
+
+def test_execute(fx_asset):
+    with Image(filename=str(fx_asset.join('mona-lisa.jpg'))) as img:
+        pipeline = img.pipeline().resize(201, 300).crop(0, 0, 100, 100) \
+                                 .flip().strip().format('png')
+        assert isinstance(pipeline, Pipeline)
+        with pipeline.execute() as result:
+            assert result.size == (100, 100)
+            assert result.format == 'PNG'
+        with Image(blob=pipeline.make_blob()) as result:
+            assert result.size == (100, 100)
+            assert result.format == 'PNG'
+        assert img.size == (402, 599)
+        assert img.format == 'JPEG'
+        with raises(AttributeError):
+            img.pipeline().nonexistent_method()
+        with raises(ValueError):
+            img.pipeline().resize(0, 0).execute()
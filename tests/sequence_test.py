@@ -124,6 +124,21 @@ def test_iterator(fx_asset):
         assert actual == expected
 
 
+def test_iterator_instances(fx_asset):
+    with Image(filename=str(fx_asset.join('nocomments.gif'))) as img:
+        frames = list(img.sequence)
+        assert frames == [img.sequence[i] for i in range(len(frames))]
+        assert [frame.index for frame in frames] == list(range(len(frames)))
+        # Each frame has only its own image, not the whole list.
+        assert all(library.MagickGetNumberImages(frame.wand) == 1
+                   for frame in frames)
+        for frame in img.sequence:
+            with frame:
+                frame.resize(10, 10)
+        assert [frame.size for frame in img.sequence] == \
+            [(10, 10)] * len(frames)
+
+
 def test_append(fx_asset):
     with Image(filename=str(fx_asset.join('apple.ico'))) as imga:
         with Image(filename=str(fx_asset.join('google.ico'))) as imgg:
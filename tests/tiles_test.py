@@ -0,0 +1,74 @@
+import tempfile
+
+from pytest import raises
+
+from wand.image import Image
+from wand.tiles import _close_tiles, process, split
+
+
+def test_split():
+    tiles = list(split((10, 5), (4, 4), overlap=1))
+    assert tiles == [
+        ((0, 0, 4, 4), (0, 0, 5, 5)),
+        ((4, 0, 4, 4), (3, 0, 6, 5)),
+        ((8, 0, 2, 4), (7, 0, 3, 5)),
+        ((0, 4, 4, 1), (0, 3, 5, 2)),
+        ((4, 4, 4, 1), (3, 3, 6, 2)),
+        ((8, 4, 2, 1), (7, 3, 3, 2)),
+    ]
+    assert list(split((4, 4), (4, 4))) == [((0, 0, 4, 4), (0, 0, 4, 4))]
+    with raises(TypeError):
+        list(split((10, 5), (0, 4)))
+    with raises(ValueError):
+        list(split((10, 5), (4, 4), overlap=-1))
+
+
+def test_process(fx_asset, tmpdir):
+    src = str(fx_asset.join('mona-lisa.jpg'))
+    dst = str(tmpdir.join('negated.png'))
+    process(src, dst, tile=(100, 150), overlap=4,
+            func=lambda tile: tile.negate(), workers=3)
+    with Image(filename=src) as expected:
+        expected.negate()
+        with Image(filename=dst) as result:
+            assert result.size == expected.size
+            assert result[0, 0] == expected[0, 0]
+            assert result[150, 200] == expected[150, 200]
+            assert result[-1, -1] == expected[-1, -1]
+
+
+def test_process_temp_dir(fx_asset, tmpdir, monkeypatch):
+    temp_dir = tmpdir.mkdir('temp')
+    monkeypatch.setattr(tempfile, 'tempdir', str(temp_dir))
+    process(str(fx_asset.join('mona-lisa.jpg')),
+            str(tmpdir.join('converted.png')), tile=(200, 200))
+    # The intermediate MPC file is removed.
+    assert temp_dir.listdir() == []
+
+
+def test_process_size_changed(fx_asset, tmpdir):
+    with raises(ValueError):
+        process(str(fx_asset.join('mona-lisa.jpg')),
+                str(tmpdir.join('resized.png')), tile=(200, 200),
+                func=lambda tile: tile.resize(10, 10))
+
+
+def test_close_tiles():
+    closed = []
+
+    class Tile(object):
+        def close(self):
+            closed.append(self)
+
+    a, b = Tile(), Tile()
+    results = iter([((0, 0, 1, 1), a), ValueError('failed'),
+                    ((1, 0, 1, 1), b)])
+
+    def next_result():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    # Tiles after a failed one are closed as well.
+    _close_tiles(iter(next_result, None))
+    assert closed == [a, b]
@@ -0,0 +1,285 @@
+""":mod:`wand.aio` --- Asynchronous interface
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module provides :class:`AsyncImage`, the :mod:`asyncio` interface
+of :class:`~wand.image.Image`.  It runs blocking MagickWand API calls
+on a bounded pool of threads instead of the event loop, so that an event
+loop can drive many cores without being blocked::
+
+    from wand.aio import AsyncImage
+
+    async def handle_upload(request):
+        data = await request.read()
+        async with await AsyncImage.open(blob=data) as img:
+            await img.transform().thumbnail(200, 200).strip()
+            return await img.make_blob('jpeg')
+
+It requires Python 3.5 or higher.
+
+.. versionadded:: 0.4.5
+
+"""
+import asyncio
+import concurrent.futures
+import functools
+import multiprocessing
+import weakref
+
+from .image import Image
+
+__all__ = 'AsyncImage', 'Runner', 'TransformChain', 'default_runner'
+
+
+class Runner(object):
+    """Runs blocking functions on a pool of threads.  The number of
+    functions which run or wait in the pool at once is limited by
+    ``concurrency``; more calls wait on the event loop instead, which
+    applies backpressure to callers.
+
+    :param workers: the number of threads.  default is the number of CPUs
+    :type workers: :class:`numbers.Integral`
+    :param concurrency: the number of functions which can be submitted to
+                        the pool at once.  default is the same to
+                        ``workers``
+    :type concurrency: :class:`numbers.Integral`
+    :param loop: the event loop.  default is the current event loop
+    :type loop: :class:`asyncio.AbstractEventLoop`
+
+    """
+
+    def __init__(self, workers=None, concurrency=None, loop=None):
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        #: (:class:`concurrent.futures.ThreadPoolExecutor`) The pool of
+        #: threads.
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers)
+        #: (:class:`numbers.Integral`) The number of functions which can
+        #: be submitted to the :attr:`executor` at once.
+        self.concurrency = concurrency or workers
+        self.loop = loop
+        # asyncio.Semaphore is bound to the event loop it's made on,
+        # so each event loop which runs functions gets its own one.
+        self.semaphores = weakref.WeakKeyDictionary()
+
+    async def run(self, func, *args, **kwargs):
+        """Runs the given function on a thread, and returns its result.
+
+        :param func: the blocking function to run
+        :type func: :class:`collections.Callable`
+        :returns: the result of the function
+
+        """
+        loop = self.loop or asyncio.get_event_loop()
+        semaphore = _per_loop(
+            self.semaphores, loop,
+            functools.partial(asyncio.Semaphore, self.concurrency)
+        )
+        async with semaphore:
+            return await loop.run_in_executor(
+                self.executor, functools.partial(func, *args, **kwargs)
+            )
+
+    def shutdown(self, wait=True):
+        """Shuts down the pool of threads.
+
+        :param wait: whether to wait for pending functions to finish.
+                     default is :const:`True`
+        :type wait: :class:`bool`
+
+        """
+        self.executor.shutdown(wait)
+
+
+def _per_loop(objects, loop, factory):
+    """Gets the object of the event ``loop`` from the ``objects`` mapping,
+    or makes one using ``factory`` if there isn't yet.
+
+    """
+    try:
+        return objects[loop]
+    except KeyError:
+        obj = objects[loop] = factory()
+        return obj
+
+
+#: (:class:`Runner`) The runner used by :class:`AsyncImage` when
+#: no runner is given.  Use :func:`default_runner()` instead.
+runner = None
+
+
+def default_runner():
+    """Gets the default :class:`Runner`.  It's made at the first call.
+
+    :returns: the default runner
+    :rtype: :class:`Runner`
+
+    """
+    global runner
+    if runner is None:
+        runner = Runner()
+    return runner
+
+
+class AsyncImage(object):
+    """The asynchronous wrapper of :class:`~wand.image.Image`.
+    Operations on the same image run one by one in order, while operations
+    on different images run in parallel.
+
+    :param image: the image to wrap.  default is an empty image
+    :type image: :class:`~wand.image.Image`
+    :param runner: the runner of blocking calls.
+                   default is :func:`default_runner()`
+    :type runner: :class:`Runner`
+
+    """
+
+    def __init__(self, image=None, runner=None):
+        if image is None:
+            image = Image()
+        elif not isinstance(image, Image):
+            raise TypeError('image must be a wand.image.Image instance, '
+                            'not ' + repr(image))
+        #: (:class:`~wand.image.Image`) The wrapped image.  Don't access
+        #: it while an operation on it is running.
+        self.image = image
+        #: (:class:`Runner`) The runner of blocking calls.
+        self.runner = runner or default_runner()
+        # asyncio.Lock is bound to the event loop it's made on, so each
+        # event loop which operates the image gets its own one.
+        self.locks = weakref.WeakKeyDictionary()
+
+    @classmethod
+    async def open(cls, runner=None, **kwargs):
+        """Opens an image on a thread.  Keyword arguments are the same
+        as :class:`~wand.image.Image`'s.
+
+        :param runner: the runner of blocking calls.
+                       default is :func:`default_runner()`
+        :type runner: :class:`Runner`
+        :returns: the opened image
+        :rtype: :class:`AsyncImage`
+
+        """
+        runner = runner or default_runner()
+        image = await runner.run(Image, **kwargs)
+        return cls(image, runner)
+
+    async def call(self, func, *args, **kwargs):
+        """Runs the blocking function on a thread after the previous
+        operations on the image are done.
+
+        :param func: the blocking function to run.  it usually takes
+                     :attr:`image`
+        :type func: :class:`collections.Callable`
+        :returns: the result of the function
+
+        """
+        lock = _per_loop(self.locks, asyncio.get_event_loop(), asyncio.Lock)
+        async with lock:
+            return await self.runner.run(func, *args, **kwargs)
+
+    async def read(self, **kwargs):
+        """Reads an image into the image.  Keyword arguments are the same
+        as :meth:`Image.read() <wand.image.Image.read>`'s.
+
+        """
+        await self.call(self.image.read, **kwargs)
+
+    async def save(self, **kwargs):
+        """Saves the image.  Keyword arguments are the same as
+        :meth:`Image.save() <wand.image.Image.save>`'s.
+
+        """
+        await self.call(self.image.save, **kwargs)
+
+    async def make_blob(self, format=None, **kwargs):
+        """Makes the binary string of the image.  Parameters are the same
+        as :meth:`Image.make_blob() <wand.image.Image.make_blob>`'s.
+
+        :returns: a blob (bytes) string
+        :rtype: :class:`bytes`
+
+        """
+        return await self.call(self.image.make_blob, format, **kwargs)
+
+    async def clone(self):
+        """Clones the image.
+
+        :returns: the cloned new image
+        :rtype: :class:`AsyncImage`
+
+        """
+        image = await self.call(self.image.clone)
+        return type(self)(image, self.runner)
+
+    def transform(self):
+        """Makes a chain of operations which runs on a single thread at
+        once when it's awaited::
+
+            await img.transform().resize(100, 100).rotate(90).strip()
+
+        :returns: the empty chain of operations
+        :rtype: :class:`TransformChain`
+
+        """
+        return TransformChain(self)
+
+    async def close(self):
+        """Closes the image."""
+        await self.call(self.image.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+
+class TransformChain(object):
+    """The chain of operations on :class:`AsyncImage`.  Calling any
+    method of :class:`~wand.image.Image` on it just appends the operation
+    to the chain, and returns the chain itself.  All operations of
+    the chain run on a thread at once when it's awaited.
+
+    :param image: the image to transform
+    :type image: :class:`AsyncImage`
+
+    """
+
+    def __init__(self, image):
+        self.image = image
+        #: (:class:`list`) The list of ``(method, args, kwargs)`` triples.
+        self.operations = []
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not callable(getattr(Image, name, None)):
+            raise AttributeError(name)
+
+        def append(*args, **kwargs):
+            self.operations.append((name, args, kwargs))
+            return self
+        return append
+
+    def apply(self, image):
+        """Applies all operations to the given ``image`` in place.
+        It blocks.
+
+        :param image: the image to transform
+        :type image: :class:`~wand.image.Image`
+
+        """
+        for name, args, kwargs in self.operations:
+            getattr(image, name)(*args, **kwargs)
+
+    async def run(self):
+        """Runs the operations on a thread.
+
+        :returns: the transformed image
+        :rtype: :class:`AsyncImage`
+
+        """
+        await self.image.call(self.apply, self.image.image)
+        return self.image
+
+    def __await__(self):
+        return self.run().__await__()
@@ -20,8 +20,9 @@ if platform.system() == "Windows":
     except ImportError:
         import _winreg as winreg
 
-__all__ = ('MagickPixelPacket', 'PointInfo', 'AffineMatrix', 'c_magick_char_p',
-           'library', 'libc', 'libmagick', 'load_library')
+__all__ = ('MagickPixelPacket', 'PointInfo', 'AffineMatrix',
+           'ChannelStatistics', 'c_magick_char_p', 'library', 'libc',
+           'libmagick', 'load_library')
 
 
 class c_magick_char_p(ctypes.c_char_p):
@@ -177,6 +178,24 @@ class AffineMatrix(ctypes.Structure):
                 ('ty', ctypes.c_double)]
 
 
+class ChannelStatistics(ctypes.Structure):
+    # ImageMagick older than 6.9.0 doesn't have the last entropy field.
+
+    _fields_ = [('depth', ctypes.c_size_t),
+                ('minima', ctypes.c_double),
+                ('maxima', ctypes.c_double),
+                ('sum', ctypes.c_double),
+                ('sum_squared', ctypes.c_double),
+                ('sum_cubed', ctypes.c_double),
+                ('sum_fourth_power', ctypes.c_double),
+                ('mean', ctypes.c_double),
+                ('variance', ctypes.c_double),
+                ('standard_deviation', ctypes.c_double),
+                ('kurtosis', ctypes.c_double),
+                ('skewness', ctypes.c_double),
+                ('entropy', ctypes.c_double)]
+
+
 # Preserve the module itself even if it fails to import
 sys.modules['wand._api'] = sys.modules['wand.api']
 
@@ -222,6 +241,16 @@ try:
     library.MagickWandGenesis.argtypes = []
     library.MagickWandTerminus.argtypes = []
 
+    library.MagickSetResourceLimit.argtypes = [ctypes.c_int,
+                                               ctypes.c_ulonglong]
+    library.MagickSetResourceLimit.restype = ctypes.c_int
+
+    library.MagickGetResourceLimit.argtypes = [ctypes.c_int]
+    library.MagickGetResourceLimit.restype = ctypes.c_ulonglong
+
+    library.MagickGetResource.argtypes = [ctypes.c_int]
+    library.MagickGetResource.restype = ctypes.c_ulonglong
+
     library.NewMagickWand.argtypes = []
     library.NewMagickWand.restype = ctypes.c_void_p
 
@@ -253,6 +282,13 @@ try:
 
     library.MagickReadImageFile.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
 
+    library.MagickPingImageBlob.argtypes = [ctypes.c_void_p, ctypes.c_void_p,
+                                            ctypes.c_size_t]
+
+    library.MagickPingImage.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+
+    library.MagickPingImageFile.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+
     library.MagickGetImageFormat.argtypes = [ctypes.c_void_p]
     library.MagickGetImageFormat.restype = c_magick_char_p
 
@@ -377,6 +413,9 @@ try:
     library.MagickSeparateImageChannel.argtypes = [ctypes.c_void_p,
                                                    ctypes.c_int]
 
+    library.MagickGetImageChannelStatistics.argtypes = [ctypes.c_void_p]
+    library.MagickGetImageChannelStatistics.restype = ctypes.c_void_p
+
     library.MagickCropImage.argtypes = [ctypes.c_void_p, ctypes.c_size_t,
                                         ctypes.c_size_t, ctypes.c_ssize_t,
                                         ctypes.c_ssize_t]
@@ -425,6 +464,10 @@ try:
                                           ctypes.c_size_t, ctypes.c_int,
                                           ctypes.c_double]
 
+    library.MagickThumbnailImage.argtypes = [ctypes.c_void_p,
+                                             ctypes.c_size_t,
+                                             ctypes.c_size_t]
+
     library.MagickTransformImage.argtypes = [ctypes.c_void_p, ctypes.c_char_p,
                                              ctypes.c_char_p]
     library.MagickTransformImage.restype = ctypes.c_void_p
@@ -459,6 +502,14 @@ try:
     library.MagickCoalesceImages.argtypes = [ctypes.c_void_p]
     library.MagickCoalesceImages.restype = ctypes.c_void_p
 
+    library.MagickOptimizeImageLayers.argtypes = [ctypes.c_void_p]
+    library.MagickOptimizeImageLayers.restype = ctypes.c_void_p
+
+    try:
+        library.MagickOptimizeImageTransparency.argtypes = [ctypes.c_void_p]
+    except AttributeError:
+        library.MagickOptimizeImageTransparency = None
+
     library.MagickIdentifyImage.argtypes = [ctypes.c_void_p]
     library.MagickIdentifyImage.restype = ctypes.c_char_p
 
@@ -511,6 +562,12 @@ try:
 
     library.PixelGetMagickColor.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
 
+    library.MagickGetImagePixelColor.argtypes = [ctypes.c_void_p,
+                                                 ctypes.c_ssize_t,
+                                                 ctypes.c_ssize_t,
+                                                 ctypes.c_void_p]
+    library.MagickGetImagePixelColor.restype = ctypes.c_int
+
     library.PixelSetMagickColor.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
 
     library.PixelSetColor.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
@@ -654,6 +711,9 @@ try:
     libmagick.GetNextImageInList.argtypes = [ctypes.c_void_p]
     libmagick.GetNextImageInList.restype = ctypes.c_void_p
 
+    libmagick.GetFirstImageInList.argtypes = [ctypes.c_void_p]
+    libmagick.GetFirstImageInList.restype = ctypes.c_void_p
+
     library.MagickGetImageDelay.argtypes = [ctypes.c_void_p]
     library.MagickGetImageDelay.restype = ctypes.c_ssize_t
 
@@ -662,6 +722,9 @@ try:
     library.NewMagickWandFromImage.argtypes = [ctypes.c_void_p]
     library.NewMagickWandFromImage.restype = ctypes.c_void_p
 
+    library.MagickGetImage.argtypes = [ctypes.c_void_p]
+    library.MagickGetImage.restype = ctypes.c_void_p
+
     library.GetImageFromMagickWand.argtypes = [ctypes.c_void_p]
     library.GetImageFromMagickWand.restype = ctypes.c_void_p
 
@@ -766,6 +829,34 @@ try:
     ]
     library.MagickGetImageHistogram.restype = ctypes.POINTER(ctypes.c_void_p)
 
+    library.DestroyPixelWands.argtypes = [ctypes.POINTER(ctypes.c_void_p),
+                                          ctypes.c_size_t]
+    library.DestroyPixelWands.restype = ctypes.POINTER(ctypes.c_void_p)
+
+    library.MagickExportImagePixels.argtypes = [
+        ctypes.c_void_p,   # wand
+        ctypes.c_ssize_t,  # x
+        ctypes.c_ssize_t,  # y
+        ctypes.c_size_t,   # columns
+        ctypes.c_size_t,   # rows
+        ctypes.c_char_p,   # map
+        ctypes.c_int,      # StorageType
+        ctypes.c_void_p,   # pixels
+    ]
+    library.MagickExportImagePixels.restype = ctypes.c_int
+
+    library.MagickImportImagePixels.argtypes = [
+        ctypes.c_void_p,   # wand
+        ctypes.c_ssize_t,  # x
+        ctypes.c_ssize_t,  # y
+        ctypes.c_size_t,   # columns
+        ctypes.c_size_t,   # rows
+        ctypes.c_char_p,   # map
+        ctypes.c_int,      # StorageType
+        ctypes.c_void_p,   # pixels
+    ]
+    library.MagickImportImagePixels.restype = ctypes.c_int
+
     # These functions are const so it's okay for them to be c_char_p
     libmagick.GetMagickVersion.argtypes = [ctypes.POINTER(ctypes.c_size_t)]
     libmagick.GetMagickVersion.restype = ctypes.c_char_p
@@ -0,0 +1,260 @@
+""":mod:`wand.batch` --- Batch processing
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module runs a function on lots of images in parallel using
+a pool of worker processes::
+
+    from wand.batch import map_images
+
+    def thumbnail(img):
+        img.thumbnail(200, 200)
+        return img.make_blob('jpeg')
+
+    for result in map_images(thumbnail, filenames, workers=8):
+        if result.error is None:
+            store(result.input, result.value)
+        else:
+            log_failure(result.input, result.error)
+
+Every worker process instantiates the MagickWand API only once and
+keeps it alive until the batch is done.  The pool of workers is created
+when the iteration starts, and shut down when it's done or stopped.
+
+It requires Python 3.3 or higher, since it depends on
+:mod:`concurrent.futures`.
+
+.. versionadded:: 0.4.5
+
+"""
+import collections
+import itertools
+import multiprocessing
+import numbers
+
+from .image import Image
+from .resource import increment_refcount, limits as resource_limits
+
+try:
+    import concurrent.futures
+    from concurrent.futures.process import BrokenProcessPool
+except ImportError:
+    BrokenProcessPool = None
+
+__all__ = 'BatchResult', 'map_images'
+
+
+class BatchResult(collections.namedtuple('BatchResult',
+                                         ['input', 'value', 'error'])):
+    """The result of the function for each input of :func:`map_images()`.
+    It's a named tuple of ``(input, value, error)``.
+
+    .. attribute:: input
+
+       The input given to :func:`map_images()`.
+
+    .. attribute:: value
+
+       The value the function returned.  :const:`None` if it failed.
+
+    .. attribute:: error
+
+       The exception raised while reading the image or running
+       the function.  :const:`None` if it succeeded.
+
+    """
+
+    __slots__ = ()
+
+
+def map_images(func, inputs, workers=None, chunksize=1, limits=None,
+               ordered=True):
+    """Runs ``func`` on every image of ``inputs`` in worker processes,
+    and then yields :class:`BatchResult` for each of them as soon as
+    it's done.
+
+    A failure of an input doesn't stop the batch; its exception is
+    yielded as :attr:`BatchResult.error` instead.  If a worker process
+    dies e.g. it's killed by the OOM killer, the inputs it was
+    processing are retried one by one, and the input which kills
+    the worker again gets
+    :exc:`~concurrent.futures.process.BrokenProcessPool` as its error.
+
+    :param func: the function which takes an :class:`~wand.image.Image`
+                 and returns a picklable value e.g. an encoded blob
+                 (:meth:`~wand.image.Image.make_blob()`), or the path
+                 the image is saved to.  it has to be picklable as well,
+                 so it should be defined at the top level of a module.
+                 the image is closed after the function returns
+    :type func: :class:`collections.Callable`
+    :param inputs: filenames, or mappings of keyword arguments of
+                   :class:`~wand.image.Image` e.g.
+                   ``{'blob': data, 'format': 'png'}``
+    :type inputs: :class:`collections.Iterable`
+    :param workers: the number of worker processes.
+                    default is the number of CPUs
+    :type workers: :class:`numbers.Integral`
+    :param chunksize: the number of inputs to send to a worker at once.
+                      a larger number reduces the overhead of
+                      communication for lots of small images.  default is 1
+    :type chunksize: :class:`numbers.Integral`
+    :param limits: resource limits to apply to every worker process.
+                   see :data:`wand.resource.limits`
+    :type limits: :class:`collections.Mapping`
+    :param ordered: whether to yield results in the same order to
+                    ``inputs``.  :const:`False` yields them in the order
+                    they are done.  default is :const:`True`
+    :type ordered: :class:`bool`
+    :returns: the iterator of :class:`BatchResult`
+    :rtype: :class:`collections.Iterator`
+    :raises KeyError: when ``limits`` has an unknown resource type
+    :raises ValueError: when ``limits`` has a limit which ImageMagick
+                        rejects
+
+    .. versionadded:: 0.4.5
+
+    """
+    if BrokenProcessPool is None:
+        raise RuntimeError('wand.batch requires Python 3.3 or higher')
+    elif not callable(func):
+        raise TypeError('func must be callable, not ' + repr(func))
+    elif workers is not None and not (isinstance(workers, numbers.Integral)
+                                      and workers > 0):
+        raise TypeError('workers must be a natural number, not ' +
+                        repr(workers))
+    elif not (isinstance(chunksize, numbers.Integral) and chunksize > 0):
+        raise TypeError('chunksize must be a natural number, not ' +
+                        repr(chunksize))
+    limits = dict(limits or {})
+    # Check the limits here rather than in workers; a worker which fails
+    # to apply them would fail every input it takes.
+    with resource_limits.scope(**limits):
+        pass
+    return _iterate(func, inputs, workers or multiprocessing.cpu_count(),
+                    chunksize, limits, ordered)
+
+
+def _iterate(func, inputs, workers, chunksize, limits, ordered):
+    """Submits chunks of ``inputs`` to a pool of ``workers``, and then
+    yields their results.  Only twice as many chunks as workers are
+    submitted at once, so that ``inputs`` is consumed as the batch goes.
+
+    """
+    inputs = iter(inputs)
+    pending = collections.deque()
+    executor = concurrent.futures.ProcessPoolExecutor(workers)
+    try:
+        while True:
+            while len(pending) < workers * 2:
+                chunk = list(itertools.islice(inputs, chunksize))
+                if not chunk:
+                    break
+                future = executor.submit(_process, func, chunk, limits)
+                pending.append((chunk, future))
+            if not pending:
+                break
+            if ordered:
+                chunk, future = pending.popleft()
+            else:
+                done, _ = concurrent.futures.wait(
+                    [f for _, f in pending],
+                    return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                chunk, future = next(p for p in pending if p[1] in done)
+                pending.remove((chunk, future))
+            try:
+                results = future.result()
+            except BrokenProcessPool:
+                # A worker died, and the pool failed every pending chunk.
+                # Chunks which had been done before keep their results,
+                # and the rest are retried in isolation, so that only
+                # the input which kills a worker fails.
+                executor.shutdown()
+                pending.appendleft((chunk, future))
+                for i, (chunk, future) in enumerate(pending):
+                    if not _succeeded(future):
+                        pending[i] = chunk, _isolate(func, chunk, limits)
+                executor = concurrent.futures.ProcessPoolExecutor(workers)
+                continue
+            for result in results:
+                yield result
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown()
+
+
+def _succeeded(future):
+    """Whether the ``future`` is done without any exception."""
+    return (future.done() and not future.cancelled() and
+            future.exception() is None)
+
+
+def _isolate(func, chunk, limits):
+    """Runs ``func`` on each input of the ``chunk`` in a separate pool of
+    a single worker, and then returns a done future of the results.
+
+    """
+    results = []
+    executor = None
+    try:
+        for input in chunk:
+            if executor is None:
+                executor = concurrent.futures.ProcessPoolExecutor(1)
+            try:
+                results.extend(
+                    executor.submit(_process, func, [input], limits).result()
+                )
+            except BrokenProcessPool as e:
+                results.append(BatchResult(input, None, e))
+                executor.shutdown()
+                executor = None
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    future = concurrent.futures.Future()
+    future.set_result(results)
+    return future
+
+
+#: (:class:`bool`) Whether the worker process has instantiated
+#: the MagickWand API and applied the resource limits.
+_initialized = False
+
+
+def _initialize(limits):
+    """Instantiates the MagickWand API for the lifetime of the worker
+    process, and applies the resource ``limits`` to it.
+
+    """
+    global _initialized
+    if _initialized:
+        return
+    for key, value in limits.items():
+        resource_limits[key] = value
+    increment_refcount()
+    _initialized = True
+
+
+def _process(func, chunk, limits):
+    """Runs the function on the image of each input of the ``chunk`` in
+    a worker process.
+
+    """
+    try:
+        _initialize(limits)
+    except Exception as e:
+        return [BatchResult(input, None, e) for input in chunk]
+    results = []
+    for input in chunk:
+        try:
+            if isinstance(input, collections.Mapping):
+                image = Image(**input)
+            else:
+                image = Image(filename=input)
+            with image:
+                value = func(image)
+        except Exception as e:
+            results.append(BatchResult(input, None, e))
+        else:
+            results.append(BatchResult(input, value, None))
+    return results
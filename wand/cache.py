@@ -0,0 +1,343 @@
+""":mod:`wand.cache` --- Caches of transformed images
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module caches encoded results of transformations, keyed by
+the content of the source image, the operations, and the output format
+and quality.  Since a source blob is keyed by its hash, a cache hit
+doesn't decode the image at all::
+
+    from wand.cache import MemoryStore, TransformCache
+
+    cache = TransformCache(MemoryStore(max_bytes=256 * 1024 * 1024))
+
+    @cache.cached(format='jpeg', quality=85)
+    def thumbnail(img, size):
+        img.thumbnail(size, size)
+
+    jpeg = thumbnail(source_blob, 200)  # renders
+    jpeg = thumbnail(source_blob, 200)  # hits the cache
+
+Operations recorded in the same way as :class:`~wand.pipeline.Pipeline`
+can be cached as well::
+
+    webp = cache.render(source_blob, [('resize', (200, 150), {})],
+                        format='webp')
+
+.. versionadded:: 0.4.5
+
+"""
+import collections
+import errno
+import functools
+import hashlib
+import os
+import os.path
+import sys
+import tempfile
+import threading
+
+from .compat import binary, binary_type, string_type
+from .image import BaseImage, Image
+
+__all__ = 'BaseStore', 'DirectoryStore', 'MemoryStore', 'TransformCache'
+
+
+class BaseStore(object):
+    """The abstract interface of backends of :class:`TransformCache`.
+    Keys are hexadecimal strings, and values are encoded blobs.
+
+    """
+
+    def get(self, key):
+        """Gets the blob of the ``key``.
+
+        :param key: the hexadecimal key
+        :type key: :class:`str`
+        :returns: the blob, or :const:`None` if there's no such key
+        :rtype: :class:`bytes`
+
+        """
+        raise NotImplementedError('get() has to be implemented')
+
+    def set(self, key, value):
+        """Stores the blob of the ``key``.
+
+        :param key: the hexadecimal key
+        :type key: :class:`str`
+        :param value: the blob
+        :type value: :class:`bytes`
+
+        """
+        raise NotImplementedError('set() has to be implemented')
+
+
+class MemoryStore(BaseStore):
+    """The in-memory store which evicts the least recently used blobs
+    when the total size of blobs exceeds ``max_bytes``.  It's thread-safe.
+
+    :param max_bytes: the maximum total bytes of blobs
+    :type max_bytes: :class:`numbers.Integral`
+
+    """
+
+    def __init__(self, max_bytes):
+        if max_bytes < 0:
+            raise ValueError('max_bytes cannot be negative, not ' +
+                             repr(max_bytes))
+        self.max_bytes = max_bytes
+        #: (:class:`numbers.Integral`) The total bytes of stored blobs.
+        self.size = 0
+        self.blobs = {}
+        # The recency of keys.  The queue may contain outdated
+        # (clock, key) pairs which don't match to self.used.
+        self.clock = 0
+        self.used = {}
+        self.queue = collections.deque()
+        self.lock = threading.Lock()
+
+    def touch(self, key):
+        self.clock += 1
+        self.used[key] = self.clock
+        self.queue.append((self.clock, key))
+        if len(self.queue) > 2 * len(self.used) + 64:
+            self.queue = collections.deque(
+                sorted((clock, key) for key, clock in self.used.items())
+            )
+
+    def get(self, key):
+        with self.lock:
+            value = self.blobs.get(key)
+            if value is not None:
+                self.touch(key)
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.blobs.get(key)
+            if old is not None:
+                self.size -= len(old)
+            self.blobs[key] = value
+            self.size += len(value)
+            self.touch(key)
+            while self.size > self.max_bytes:
+                clock, lru = self.queue.popleft()
+                if self.used.get(lru) == clock:  # the least recently used
+                    del self.used[lru]
+                    self.size -= len(self.blobs.pop(lru))
+
+    def __len__(self):
+        return len(self.blobs)
+
+
+class DirectoryStore(BaseStore):
+    """The on-disk store which keeps each blob as a file in the ``path``
+    directory.  Files are written atomically, so several processes
+    can share the same directory.  It never evicts blobs by itself.
+
+    :param path: the directory path.  it's made if it doesn't exist
+    :type path: :class:`basestring`
+
+    """
+
+    def __init__(self, path):
+        if not isinstance(path, string_type):
+            raise TypeError('path must be a string, not ' + repr(path))
+        self.path = path
+
+    def get_path(self, key):
+        """Gets the file path of the ``key``.
+
+        :param key: the hexadecimal key
+        :type key: :class:`str`
+        :returns: the file path
+        :rtype: :class:`str`
+
+        """
+        return os.path.join(self.path, key[:2], key[2:])
+
+    def get(self, key):
+        try:
+            with open(self.get_path(key), 'rb') as f:
+                return f.read()
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+    def set(self, key, value):
+        path = self.get_path(key)
+        dirname = os.path.dirname(path)
+        try:
+            os.makedirs(dirname)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        fd, temp_path = tempfile.mkstemp(dir=dirname)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(value)
+            _replace(temp_path, path)
+        except:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+def _replace(src, dst):
+    """Atomically renames the ``src`` file to ``dst`` even if ``dst``
+    already exists.
+
+    """
+    try:
+        replace = os.replace
+    except AttributeError:  # Python 2 and < 3.3
+        # os.rename() fails on Windows if dst exists.  It's not atomic,
+        # but only Windows needs it.
+        if sys.platform == 'win32' and os.path.exists(dst):
+            os.remove(dst)
+        replace = os.rename
+    replace(src, dst)
+
+
+class TransformCache(object):
+    """Caches encoded results of transformations in the ``store``.
+
+    :param store: the backend store
+    :type store: :class:`BaseStore`
+
+    """
+
+    def __init__(self, store):
+        if not isinstance(store, BaseStore):
+            raise TypeError('store must be a wand.cache.BaseStore instance, '
+                            'not ' + repr(store))
+        self.store = store
+
+    def key(self, source, operations, format=None, quality=None):
+        """Makes the cache key.
+
+        :param source: the source blob, or the source image.  a blob is
+                       keyed by its SHA-256 hash, and an image is keyed by
+                       its :attr:`~wand.image.BaseImage.signature` and
+                       :attr:`~wand.image.BaseImage.format`
+        :type source: :class:`bytes`, :class:`~wand.image.BaseImage`
+        :param operations: the sequence of operations.  its :func:`repr()`
+                           has to identify the operations
+        :type operations: :class:`collections.Sequence`
+        :param format: the output format
+        :type format: :class:`basestring`
+        :param quality: the output compression quality
+        :type quality: :class:`numbers.Integral`
+        :returns: the hexadecimal key
+        :rtype: :class:`str`
+
+        """
+        if isinstance(source, BaseImage):
+            source_key = 'signature:{0}:{1}'.format(
+                source.signature, source.format
+            )
+        elif isinstance(source, binary_type):
+            source_key = 'sha256:' + hashlib.sha256(source).hexdigest()
+        else:
+            raise TypeError('source must be a bytes or an image, not ' +
+                            repr(source))
+        key = hashlib.sha256()
+        for part in (source_key, repr(operations), repr(format),
+                     repr(quality)):
+            key.update(binary(part))
+            key.update(b'\0')
+        return key.hexdigest()
+
+    def get_or_render(self, source, operations, render, format=None,
+                      quality=None):
+        """Gets the cached blob, or renders and stores it if there's
+        no cached one.
+
+        :param source: the source blob, or the source image
+        :type source: :class:`bytes`, :class:`~wand.image.BaseImage`
+        :param operations: the sequence of operations.  see :meth:`key()`
+        :type operations: :class:`collections.Sequence`
+        :param render: the function which takes an image to transform
+                       in-place.  the image is a clone if the ``source``
+                       is an image
+        :type render: :class:`collections.Callable`
+        :param format: the output format.  default is the source format
+        :type format: :class:`basestring`
+        :param quality: the output compression quality
+        :type quality: :class:`numbers.Integral`
+        :returns: the encoded blob
+        :rtype: :class:`bytes`
+
+        """
+        key = self.key(source, operations, format, quality)
+        blob = self.store.get(key)
+        if blob is not None:
+            return blob
+        if isinstance(source, BaseImage):
+            image = source.clone()
+        else:
+            image = Image(blob=source)
+        with image:
+            render(image)
+            if format is not None:
+                image.format = format
+            if quality is not None:
+                image.compression_quality = quality
+            blob = image.make_blob()
+        self.store.set(key, blob)
+        return blob
+
+    def render(self, source, operations, format=None, quality=None):
+        """Gets the cached result of the ``operations``, or renders it.
+
+        :param source: the source blob, or the source image
+        :type source: :class:`bytes`, :class:`~wand.image.BaseImage`
+        :param operations: the list of ``(name, args, kwargs)`` triples
+                           like :attr:`Pipeline.operations
+                           <wand.pipeline.Pipeline.operations>`
+        :type operations: :class:`collections.Sequence`
+        :param format: the output format.  default is the source format
+        :type format: :class:`basestring`
+        :param quality: the output compression quality
+        :type quality: :class:`numbers.Integral`
+        :returns: the encoded blob
+        :rtype: :class:`bytes`
+
+        """
+        operations = [(name, tuple(args), sorted(kwargs.items()))
+                      for name, args, kwargs in operations]
+
+        def render(image):
+            pipeline = image.pipeline()
+            pipeline.operations = [(name, args, dict(kwargs))
+                                   for name, args, kwargs in operations]
+            pipeline.apply(image)
+        return self.get_or_render(source, operations, render, format, quality)
+
+    def cached(self, format=None, quality=None):
+        """The decorator which caches results of the function.
+        The decorated function takes an image to transform in-place
+        and more arguments, and the wrapped function takes a source
+        blob (or image) instead of the image, and returns the encoded
+        blob.  Arguments are keyed by their :func:`repr()`.
+
+        :param format: the output format.  default is the source format
+        :type format: :class:`basestring`
+        :param quality: the output compression quality
+        :type quality: :class:`numbers.Integral`
+
+        """
+        def decorator(function):
+            name = '{0}.{1}'.format(function.__module__, function.__name__)
+
+            @functools.wraps(function)
+            def wrapped(source, *args, **kwargs):
+                operations = name, args, sorted(kwargs.items())
+                return self.get_or_render(
+                    source, operations,
+                    lambda image: function(image, *args, **kwargs),
+                    format, quality
+                )
+            return wrapped
+        return decorator
@@ -9,9 +9,14 @@ import ctypes
 from .api import MagickPixelPacket, library
 from .compat import binary, text
 from .resource import Resource
-from .version import QUANTUM_DEPTH
+from .version import QUANTUM_DEPTH, QUANTUM_RANGE
 
-__all__ = 'Color', 'scale_quantum_to_int8'
+__all__ = 'Color', 'clamp_to_quantum', 'scale_quantum_to_int8'
+
+#: (:class:`numbers.Integral`) The value of ``CMYKColorspace`` in
+#: the ``ColorspaceType`` enumeration, i.e. the index of ``'cmyk'`` in
+#: :const:`wand.image.COLORSPACE_TYPES`.
+CMYK_COLORSPACE = 12
 
 
 class Color(Resource):
@@ -40,6 +45,12 @@ class Color(Resource):
     .. versionchanged:: 0.3.0
        :class:`Color` objects become hashable.
 
+    .. versionchanged:: 0.4.5
+       Channel values are read directly from the :attr:`packet`, and
+       comparing and hashing don't allocate any resource either.
+       Only :attr:`string` and :attr:`normalized_string` need
+       the resource.
+
     .. seealso::
 
        `ImageMagick Color Names`_
@@ -89,6 +100,17 @@ class Color(Resource):
     def __getinitargs__(self):
         return self.string, None
 
+    @property
+    def packet(self):
+        """(:class:`~wand.api.MagickPixelPacket`) The color structure
+        which shares the memory of :attr:`raw`.  Channel values are in
+        quantum scale (from 0 to :const:`~wand.version.QUANTUM_RANGE`).
+
+        .. versionadded:: 0.4.5
+
+        """
+        return MagickPixelPacket.from_buffer(self.raw)
+
     def __enter__(self):
         if not self.allocated:
             with self.allocate():
@@ -143,44 +165,60 @@ class Color(Resource):
         return bool(library.IsPixelWandSimilar(a, b, 0) and
                     alpha(a) == alpha(b))
 
+    def quantized(self):
+        """Gets the tuple of channel values rounded to quanta, which is
+        compared and hashed.  Every fully transparent color is the same,
+        so it returns :const:`None` for them.
+
+        :returns: ``(red, green, blue, opacity, index)`` quanta.
+                  ``index`` is the black channel of CMYK colors,
+                  and 0 for other colors
+        :rtype: :class:`tuple`
+
+        .. versionadded:: 0.4.5
+
+        """
+        packet = self.packet
+        opacity = clamp_to_quantum(packet.opacity)
+        if opacity == QUANTUM_RANGE:
+            return None
+        if packet.colorspace == CMYK_COLORSPACE:
+            index = clamp_to_quantum(packet.index)
+        else:
+            index = 0
+        return (clamp_to_quantum(packet.red), clamp_to_quantum(packet.green),
+                clamp_to_quantum(packet.blue), opacity, index)
+
     def __eq__(self, other):
         if not isinstance(other, Color):
             return False
-        with self as this:
-            with other:
-                return self.c_equals(this.resource, other.resource)
+        return self.quantized() == other.quantized()
 
     def __ne__(self, other):
         return not (self == other)
 
     def __hash__(self):
-        if self.alpha:
-            return hash(self.normalized_string)
-        return hash(None)
+        return hash(self.quantized())
 
     @property
     def red(self):
         """(:class:`numbers.Real`) Red, from 0.0 to 1.0."""
-        with self:
-            return library.PixelGetRed(self.resource)
+        return self.packet.red / QUANTUM_RANGE
 
     @property
     def green(self):
         """(:class:`numbers.Real`) Green, from 0.0 to 1.0."""
-        with self:
-            return library.PixelGetGreen(self.resource)
+        return self.packet.green / QUANTUM_RANGE
 
     @property
     def blue(self):
         """(:class:`numbers.Real`) Blue, from 0.0 to 1.0."""
-        with self:
-            return library.PixelGetBlue(self.resource)
+        return self.packet.blue / QUANTUM_RANGE
 
     @property
     def alpha(self):
         """(:class:`numbers.Real`) Alpha value, from 0.0 to 1.0."""
-        with self:
-            return library.PixelGetAlpha(self.resource)
+        return 1.0 - self.packet.opacity / QUANTUM_RANGE
 
     @property
     def red_quantum(self):
@@ -190,8 +228,7 @@ class Color(Resource):
         .. versionadded:: 0.3.0
 
         """
-        with self:
-            return library.PixelGetRedQuantum(self.resource)
+        return clamp_to_quantum(self.packet.red)
 
     @property
     def green_quantum(self):
@@ -201,8 +238,7 @@ class Color(Resource):
         .. versionadded:: 0.3.0
 
         """
-        with self:
-            return library.PixelGetGreenQuantum(self.resource)
+        return clamp_to_quantum(self.packet.green)
 
     @property
     def blue_quantum(self):
@@ -212,8 +248,7 @@ class Color(Resource):
         .. versionadded:: 0.3.0
 
         """
-        with self:
-            return library.PixelGetBlueQuantum(self.resource)
+        return clamp_to_quantum(self.packet.blue)
 
     @property
     def alpha_quantum(self):
@@ -223,8 +258,7 @@ class Color(Resource):
         .. versionadded:: 0.3.0
 
         """
-        with self:
-            return library.PixelGetAlphaQuantum(self.resource)
+        return clamp_to_quantum(QUANTUM_RANGE - self.packet.opacity)
 
     @property
     def red_int8(self):
@@ -286,6 +320,25 @@ class Color(Resource):
                            blue=self.blue_int8)
 
 
+def clamp_to_quantum(value):
+    """Straightforward port of :c:func:`ClampToQuantum()` inline
+    function of non-HDRI builds.
+
+    :param value: the channel value in quantum scale
+    :type value: :class:`numbers.Real`
+    :returns: the rounded quantum value
+    :rtype: :class:`numbers.Integral`
+
+    .. versionadded:: 0.4.5
+
+    """
+    if value <= 0:
+        return 0
+    elif value >= QUANTUM_RANGE:
+        return QUANTUM_RANGE
+    return int(value + 0.5)
+
+
 def scale_quantum_to_int8(quantum):
     """Straightforward port of :c:func:`ScaleQuantumToChar()` inline
     function.
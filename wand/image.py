@@ -10,30 +10,42 @@ error happened)::
         print('height =', i.height)
 
 """
+import array
 import collections
+import contextlib
 import ctypes
 import functools
+import itertools
+import math
+import mmap
+import multiprocessing.pool
 import numbers
+import operator
+import sys
 import weakref
 
 from . import compat
-from .api import MagickPixelPacket, libc, libmagick, library
+from .api import (ChannelStatistics, MagickPixelPacket, c_magick_char_p,
+                  libc, libmagick, library)
 from .color import Color
 from .compat import (binary, binary_type, encode_filename, file_types,
                      string_type, text, xrange)
-from .exceptions import MissingDelegateError, WandException
+from .exceptions import (MissingDelegateError, WandException,
+                         WandLibraryVersionError)
 from .resource import DestroyedResourceError, Resource
 from .font import Font
+from .version import MAGICK_VERSION_INFO, QUANTUM_RANGE, configure_options
 
 
 __all__ = ('ALPHA_CHANNEL_TYPES', 'CHANNELS', 'COLORSPACE_TYPES',
            'COMPARE_METRICS', 'COMPOSITE_OPERATORS', 'COMPRESSION_TYPES',
            'EVALUATE_OPS', 'FILTER_TYPES',
            'GRAVITY_TYPES', 'IMAGE_TYPES', 'ORIENTATION_TYPES', 'UNIT_TYPES',
-           'FUNCTION_TYPES',
+           'FUNCTION_TYPES', 'PIXEL_CHANNELS', 'STORAGE_TYPES',
            'BaseImage', 'ChannelDepthDict', 'ChannelImageDict',
-           'ClosedImageError', 'HistogramDict', 'Image', 'ImageProperty',
-           'Iterator', 'Metadata', 'OptionDict', 'manipulative')
+           'ChannelStatisticsDict', 'ClosedImageError', 'HistogramDict',
+           'Image', 'ImageProperty', 'Iterator', 'Metadata', 'OptionDict',
+           'PingedImageError', 'is_hdri', 'iter_frames', 'manipulative')
 
 
 #: (:class:`tuple`) The list of filter types.
@@ -535,17 +547,230 @@ IMAGE_LAYER_METHOD = ('undefined', 'coalesce', 'compareany', 'compareclear',
                       'removezero', 'composite', 'merge', 'flatten', 'mosaic',
                       'trimbounds')
 
+#: (:class:`tuple`) The list of pixel storage types used by
+#: :meth:`~BaseImage.export_pixels()` and :meth:`~BaseImage.import_pixels()`.
+#:
+#: - ``'undefined'``
+#: - ``'char'``
+#: - ``'double'``
+#: - ``'float'``
+#: - ``'integer'``
+#: - ``'long'``
+#: - ``'quantum'``
+#: - ``'short'``
+#:
+#: .. note::
+#:
+#:    Only ``'char'``, ``'double'``, ``'float'``, ``'integer'`` and
+#:    ``'short'`` have a fixed size, so the others can't be used for
+#:    bulk pixel transfer.
+#:
+#: .. versionadded:: 0.4.5
+STORAGE_TYPES = ('undefined', 'char', 'double', 'float', 'integer', 'long',
+                 'quantum', 'short')
+
+#: (:class:`dict`) The byte size of each channel value for every
+#: supported :const:`STORAGE_TYPES`.
+STORAGE_SIZES = {
+    'char': ctypes.sizeof(ctypes.c_ubyte),
+    'double': ctypes.sizeof(ctypes.c_double),
+    'float': ctypes.sizeof(ctypes.c_float),
+    'integer': ctypes.sizeof(ctypes.c_uint),
+    'short': ctypes.sizeof(ctypes.c_ushort)
+}
+
+#: (:class:`str`) The byte order character of NumPy array interface
+#: type strings for the native byte order.
+NATIVE_BYTE_ORDER = '<' if sys.byteorder == 'little' else '>'
+
+#: (:class:`dict`) The mapping of NumPy array interface type strings
+#: (without byte order) to :const:`STORAGE_TYPES`.
+#:
+#: .. versionadded:: 0.4.5
+ARRAY_STORAGE_TYPES = {
+    'u1': 'char', 'u2': 'short', 'u4': 'integer',
+    'f4': 'float', 'f8': 'double'
+}
+
+#: (:class:`frozenset`) The channel letters which can be used in
+#: the ``channel_map`` of :meth:`~BaseImage.export_pixels()` and
+#: :meth:`~BaseImage.import_pixels()`.
+#:
+#: - ``'R'``: red
+#: - ``'G'``: green
+#: - ``'B'``: blue
+#: - ``'A'``: alpha (0 is transparent)
+#: - ``'O'``: opacity (0 is opaque)
+#: - ``'C'``: cyan
+#: - ``'M'``: magenta
+#: - ``'Y'``: yellow
+#: - ``'K'``: black
+#: - ``'I'``: intensity (grayscale)
+#: - ``'P'``: pad
+#:
+#: .. versionadded:: 0.4.5
+PIXEL_CHANNELS = frozenset('RGBAOCMYKIP')
+
+#: (:class:`tuple`) The coder options :meth:`Image.read()` sets to
+#: the ``decode_hint`` size so that decoders can scale images down
+#: while decoding them e.g. JPEG's DCT scaling.
+#:
+#: .. versionadded:: 0.4.5
+DECODE_HINT_OPTIONS = (b'jpeg:size',)
+
+
+def _size_t_typecode():
+    size = ctypes.sizeof(ctypes.c_size_t)
+    for typecode in 'ILQ':
+        try:
+            if array.array(typecode).itemsize == size:
+                return typecode
+        except ValueError:  # 'Q' is unavailable in Python 2
+            continue
+
+
+#: (:class:`str`) The :mod:`array` typecode whose item is as large as
+#: :c:type:`size_t`, e.g. ``'L'`` on most 64-bit Unix systems, but ``'Q'``
+#: on 64-bit Windows.
+#:
+#: .. versionadded:: 0.4.5
+SIZE_T_TYPECODE = _size_t_typecode()
+
+
+#: (:class:`bool`) Whether the linked ImageMagick is an HDRI build,
+#: which stores pixels as floating point numbers.  Use :func:`is_hdri()`
+#: instead.
+hdri = None
+
+
+def is_hdri():
+    """Whether the linked ImageMagick is an HDRI build.  It's queried
+    at the first call.
+
+    :rtype: :class:`bool`
+
+    .. versionadded:: 0.4.5
+
+    """
+    global hdri
+    if hdri is None:
+        features = configure_options('FEATURES').get('FEATURES', '')
+        hdri = 'HDRI' in features.split()
+    return hdri
+
 
 def manipulative(function):
     """Mark the operation manipulating itself instead of returning new one."""
     @functools.wraps(function)
     def wrapped(self, *args, **kwargs):
+        self.ensure_pixels()
         result = function(self, *args, **kwargs)
         self.dirty = True
         return result
     return wrapped
 
 
+def c_buffer(data):
+    """Gets the pointer of the given buffer object which can be passed
+    to MagickWand API functions without copying it if possible.
+
+    :param data: a :class:`bytes` string or any object which implements
+                 the buffer protocol e.g. :class:`bytearray`,
+                 :class:`memoryview`, :class:`mmap.mmap`
+    :returns: a pair of the pointer (or :class:`bytes` which ctypes can
+              take as a pointer) and its byte size
+    :rtype: :class:`tuple`
+
+    .. note::
+
+       Read-only buffers other than :class:`bytes` have to be copied once
+       since :mod:`ctypes` can't take their address.
+
+    .. note::
+
+       It's only for internal use.
+
+    .. versionadded:: 0.4.5
+
+    """
+    if isinstance(data, binary_type):
+        return data, len(data)
+    try:
+        view = memoryview(data)
+    except NameError:
+        # Python 2.6 has no memoryview, but only the old buffer interface.
+        size = len(buffer(data))  # noqa
+        try:
+            return (ctypes.c_char * size).from_buffer(data), size
+        except TypeError:  # read-only
+            return str(buffer(data)), size  # noqa
+    except TypeError:
+        # Python 2's mmap implements only the old buffer interface.
+        if not isinstance(data, mmap.mmap):
+            raise
+        return (ctypes.c_char * len(data)).from_buffer(data), len(data)
+    obj = getattr(view, 'obj', None)
+    if isinstance(obj, binary_type) and view.nbytes == len(obj):
+        return obj, len(obj)  # a view of the whole bytes
+    size = getattr(view, 'nbytes', None)
+    if size is None:
+        size = view.itemsize
+        for dimension in view.shape or ():
+            size *= dimension
+    if not view.readonly:
+        try:
+            return (ctypes.c_char * size).from_buffer(data), size
+        except (TypeError, ValueError):
+            pass  # not contiguous; fall back to copying
+    return view.tobytes(), size
+
+
+def array_from_ctypes(typecode, data):
+    """Copies the memory of the ctypes ``data`` into a new
+    :class:`array.array` of the ``typecode`` at once.
+
+    :param typecode: the typecode of the array
+    :type typecode: :class:`str`
+    :param data: a ctypes object e.g. :class:`ctypes.Array`
+    :returns: the array
+    :rtype: :class:`array.array`
+
+    """
+    result = array.array(typecode)
+    raw = ctypes.string_at(ctypes.addressof(data), ctypes.sizeof(data))
+    if hasattr(result, 'frombytes'):
+        result.frombytes(raw)
+    else:
+        result.fromstring(raw)
+    return result
+
+
+@contextlib.contextmanager
+def map_file(filename):
+    """Maps the file of the ``filename`` into memory in copy-on-write
+    mode, so that :func:`c_buffer()` can take its address without copying
+    pages which are already in the page cache.  It yields :const:`None`
+    if the file is empty, which can't be mapped.
+
+    .. note::
+
+       It's only for internal use.
+
+    .. versionadded:: 0.4.5
+
+    """
+    with open(filename, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except ValueError:  # an empty file
+            yield None
+            return
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
 class BaseImage(Resource):
     """The abstract base of :class:`Image` (container) and
     :class:`~wand.sequence.SingleImage`.  That means the most of
@@ -576,6 +801,12 @@ class BaseImage(Resource):
     #: (:class:`bool`) Whether the image is changed or not.
     dirty = None
 
+    #: (:class:`bool`) Whether the image is read by :meth:`Image.ping()`
+    #: i.e. only its attributes are read and there are no pixels.
+    #:
+    #: .. versionadded:: 0.4.5
+    pinged = False
+
     c_is_resource = library.IsMagickWand
     c_destroy_resource = library.DestroyMagickWand
     c_get_exception = library.MagickGetException
@@ -612,6 +843,21 @@ class BaseImage(Resource):
     def wand(self):
         del self.resource
 
+    def ensure_pixels(self):
+        """Raises :exc:`PingedImageError` if the image has no pixels
+        since it's read by :meth:`Image.ping()`.
+
+        :raises PingedImageError: when the image is :attr:`pinged`
+
+        .. versionadded:: 0.4.5
+
+        """
+        if self.pinged:
+            raise PingedImageError(
+                repr(self) + ' is pinged; it has no pixels to operate on. '
+                'read the image instead of pinging it'
+            )
+
     def clone(self):
         """Clones the image. It is equivalent to call :class:`Image` with
         ``image`` parameter. ::
@@ -628,10 +874,31 @@ class BaseImage(Resource):
         """
         return Image(image=self)
 
+    def pipeline(self):
+        """Makes a lazy pipeline of operations on the image.  Operations
+        are recorded instead of running immediately, and redundant ones
+        are removed before running them at once on a clone of
+        the image::
+
+            blob = img.pipeline().resize(800, 600).crop(0, 0, 400, 300) \\
+                      .strip().format('webp').make_blob()
+
+        See :class:`~wand.pipeline.Pipeline` for details.
+
+        :returns: the empty pipeline
+        :rtype: :class:`~wand.pipeline.Pipeline`
+
+        .. versionadded:: 0.4.5
+
+        """
+        from .pipeline import Pipeline
+        return Pipeline(self)
+
     def __len__(self):
         return self.height
 
     def __iter__(self):
+        self.ensure_pixels()
         return Iterator(image=self)
 
     def __getitem__(self, idx):
@@ -666,9 +933,7 @@ class BaseImage(Resource):
                         raise IndexError('x cannot be less than 0')
                     elif y < 0:
                         raise IndexError('y cannot be less than 0')
-                    with iter(self) as iterator:
-                        iterator.seek(y)
-                        return iterator.next(x)
+                    return self.get_pixel(x, y)
                 if not (x.step is None and y.step is None):
                     raise ValueError('slicing with step is unsupported')
                 elif (x.start is None and x.stop is None and
@@ -698,8 +963,78 @@ class BaseImage(Resource):
             return self[:, idx]
         raise TypeError('unsupported index type: ' + repr(idx))
 
+    def get_pixel(self, x, y):
+        """Gets the color of the pixel at the given coordinates.
+        It's the same as ``img[x, y]``.
+
+        :param x: the x-coordinate.  negative values count from the end
+        :type x: :class:`numbers.Integral`
+        :param y: the y-coordinate.  negative values count from the end
+        :type y: :class:`numbers.Integral`
+        :returns: the color of the pixel
+        :rtype: :class:`~wand.color.Color`
+        :raises IndexError: when the coordinates are out of the image
+
+        .. versionadded:: 0.4.5
+
+        """
+        return self.get_pixels([(x, y)])[0]
+
+    def get_pixels(self, points):
+        """Gets colors of pixels at the given coordinates at once
+        (:c:func:`MagickGetImagePixelColor`).  Unlike ``img[x, y]`` in
+        the previous versions, it doesn't read whole rows, so that it's
+        cheap to probe sparse pixels::
+
+            import random
+            points = [(random.randrange(img.width),
+                       random.randrange(img.height)) for _ in range(1000)]
+            dominant = collections.Counter(img.get_pixels(points))
+
+        :param points: ``(x, y)`` pairs e.g. a list of tuples,
+                       an ``N x 2`` :class:`numpy.ndarray`.  negative
+                       values count from the end
+        :type points: :class:`collections.Iterable`
+        :returns: the list of colors of the pixels in the same order
+        :rtype: :class:`list`
+        :raises IndexError: when any of the coordinates are out of the image
+
+        .. versionadded:: 0.4.5
+
+        """
+        self.ensure_pixels()
+        width, height = self.size
+        colors = []
+        pixel = library.NewPixelWand()
+        try:
+            for x, y in points:
+                if not (isinstance(x, numbers.Integral) and
+                        isinstance(y, numbers.Integral)):
+                    raise TypeError('x and y must be integral, not ' +
+                                    repr((x, y)))
+                x0 = x + width if x < 0 else x
+                y0 = y + height if y < 0 else y
+                if not (0 <= x0 < width and 0 <= y0 < height):
+                    raise IndexError('{0!r} is out of the image'.format(
+                        (x, y)
+                    ))
+                if not library.MagickGetImagePixelColor(self.wand, x0, y0,
+                                                        pixel):
+                    self.raise_exception()
+                buffer = ctypes.create_string_buffer(
+                    ctypes.sizeof(MagickPixelPacket)
+                )
+                library.PixelGetMagickColor(pixel, buffer)
+                colors.append(Color(raw=buffer))
+        finally:
+            library.DestroyPixelWand(pixel)
+        return colors
+
     def __eq__(self, other):
         if isinstance(other, type(self)):
+            # pinged images have no pixels to compute their signatures.
+            if self.pinged or other.pinged:
+                return self is other
             return self.signature == other.signature
         return False
 
@@ -707,6 +1042,8 @@ class BaseImage(Resource):
         return not (self == other)
 
     def __hash__(self):
+        if self.pinged:
+            return object.__hash__(self)
         return hash(self.signature)
 
     @property
@@ -1206,6 +1543,7 @@ class BaseImage(Resource):
         .. versionadded:: 0.1.9
 
         """
+        self.ensure_pixels()
         signature = library.MagickGetImageSignature(self.wand)
         return text(signature.value)
 
@@ -1345,8 +1683,317 @@ class BaseImage(Resource):
         .. versionadded:: 0.3.0
 
         """
+        self.ensure_pixels()
         return HistogramDict(self)
 
+    @property
+    def statistics(self):
+        """(:class:`ChannelStatisticsDict`) The mapping of channels to
+        their statistics e.g. mean, standard deviation, minima and maxima,
+        which are computed at once by ImageMagick.  It doesn't follow
+        later changes of the image. ::
+
+            stats = img.statistics
+            if stats['composite_channels'].standard_deviation < 1000:
+                print('flat image')
+
+        .. versionadded:: 0.4.5
+
+        """
+        self.ensure_pixels()
+        return ChannelStatisticsDict(self)
+
+    def _pixel_region(self, x, y, width, height, channel_map, storage):
+        """Validates the arguments of :meth:`export_pixels()` and
+        :meth:`import_pixels()`, and then returns the normalized
+        ``(x, y, width, height, channel_map, storage, size)`` tuple.
+
+        """
+        if not isinstance(x, numbers.Integral):
+            raise TypeError('x must be an integer, not ' + repr(x))
+        elif not isinstance(y, numbers.Integral):
+            raise TypeError('y must be an integer, not ' + repr(y))
+        elif not isinstance(channel_map, string_type):
+            raise TypeError('channel_map must be a string, not ' +
+                            repr(channel_map))
+        elif not isinstance(storage, string_type):
+            raise TypeError('storage must be a string, not ' + repr(storage))
+        if width is None:
+            width = self.width - x
+        if height is None:
+            height = self.height - y
+        if not isinstance(width, numbers.Integral):
+            raise TypeError('width must be an integer, not ' + repr(width))
+        elif not isinstance(height, numbers.Integral):
+            raise TypeError('height must be an integer, not ' + repr(height))
+        elif x < 0 or y < 0:
+            raise ValueError('x and y cannot be less than 0, not ' +
+                             repr((x, y)))
+        elif width < 1 or height < 1:
+            raise ValueError('width and height must be natural numbers, '
+                             'not ' + repr((width, height)))
+        elif x + width > self.width or y + height > self.height:
+            raise ValueError('the region {0!r} is out of the image {1!r}'
+                             .format((x, y, width, height), self.size))
+        channel_map = channel_map.upper()
+        if not channel_map or not PIXEL_CHANNELS.issuperset(channel_map):
+            raise ValueError('channel_map must consist of PIXEL_CHANNELS, '
+                             'not ' + repr(channel_map))
+        try:
+            storage_size = STORAGE_SIZES[storage]
+        except KeyError:
+            raise ValueError('storage must be one of ' +
+                             repr(sorted(STORAGE_SIZES)) + ', not ' +
+                             repr(storage))
+        size = width * height * len(channel_map) * storage_size
+        return (x, y, width, height, binary(channel_map),
+                STORAGE_TYPES.index(storage), size)
+
+    def export_pixels(self, x=0, y=0, width=None, height=None,
+                      channel_map='RGBA', storage='char'):
+        """Exports the pixels of the given rectangle into a single
+        contiguous buffer at once (:c:func:`MagickExportImagePixels`).
+        It's much faster than iterating :class:`Iterator` since
+        it doesn't make :class:`~wand.color.Color` for every pixel::
+
+            rgba = img.export_pixels(channel_map='RGBA', storage='char')
+            assert len(rgba) == img.width * img.height * 4
+
+        :param x: the x-offset of the rectangle.  default is 0
+        :type x: :class:`numbers.Integral`
+        :param y: the y-offset of the rectangle.  default is 0
+        :type y: :class:`numbers.Integral`
+        :param width: the width of the rectangle.
+                      default is the rest of the :attr:`width`
+        :type width: :class:`numbers.Integral`
+        :param height: the height of the rectangle.
+                       default is the rest of the :attr:`height`
+        :type height: :class:`numbers.Integral`
+        :param channel_map: the order of channels for each pixel
+                            e.g. ``'RGB'``, ``'BGRA'``, ``'I'``.
+                            see :const:`PIXEL_CHANNELS` also.
+                            default is ``'RGBA'``
+        :type channel_map: :class:`basestring`
+        :param storage: the type of each channel value.  one of ``'char'``,
+                        ``'short'``, ``'integer'``, ``'float'`` and
+                        ``'double'``.  default is ``'char'``
+        :type storage: :class:`basestring`
+        :returns: the packed pixels in native byte order, row by row
+        :rtype: :class:`bytearray`
+        :raises ValueError: when the rectangle is out of the image,
+                            or ``channel_map``/``storage`` is invalid
+
+        .. versionadded:: 0.4.5
+
+        """
+        self.ensure_pixels()
+        x, y, width, height, channel_map, storage, size = self._pixel_region(
+            x, y, width, height, channel_map, storage
+        )
+        pixels = bytearray(size)
+        buffer = (ctypes.c_char * size).from_buffer(pixels)
+        r = library.MagickExportImagePixels(self.wand, x, y, width, height,
+                                            channel_map, storage, buffer)
+        del buffer  # releases the export of the bytearray
+        if not r:
+            self.raise_exception()
+        return pixels
+
+    def iter_rows(self, channel_map='RGBA', storage='char'):
+        """Iterates the rows of the image from top to bottom.  Unlike
+        :class:`Iterator` which makes a :class:`~wand.color.Color` for
+        every pixel, each row is a single packed buffer exported at once,
+        i.e. the same as :meth:`export_pixels()` of the row::
+
+            for y, row in enumerate(img.iter_rows(channel_map='A')):
+                if any(row):  # the row has non-transparent pixels
+                    top = y
+                    break
+
+        :param channel_map: the order of channels for each pixel.
+                            default is ``'RGBA'``
+        :type channel_map: :class:`basestring`
+        :param storage: the type of each channel value.
+                        default is ``'char'``
+        :type storage: :class:`basestring`
+        :returns: the iterator of rows.  every row is a new
+                  :class:`bytearray`
+        :rtype: :class:`collections.Iterator`
+
+        .. versionadded:: 0.4.5
+
+        """
+        self.ensure_pixels()
+        _, _, width, _, channel_map, storage, size = self._pixel_region(
+            0, 0, None, 1, channel_map, storage
+        )
+
+        def iterate():
+            for y in xrange(self.height):
+                row = bytearray(size)
+                buffer = (ctypes.c_char * size).from_buffer(row)
+                r = library.MagickExportImagePixels(self.wand, 0, y, width, 1,
+                                                    channel_map, storage,
+                                                    buffer)
+                del buffer
+                if not r:
+                    self.raise_exception()
+                yield row
+        return iterate()
+
+    @property
+    def __array_interface__(self):
+        """(:class:`dict`) The `NumPy array interface`_ of the image.
+        It makes :func:`numpy.asarray()` able to take images without
+        iterating pixels::
+
+            array = numpy.asarray(img)
+            assert array.shape == (img.height, img.width, 4)
+
+        The array is ``height x width x channels`` where channels are
+        ``RGBA`` if the image has :attr:`alpha_channel` or ``RGB``
+        otherwise.  The type of values is determined by the :attr:`depth`
+        of the image: :class:`numpy.uint8` for 8 bits, :class:`numpy.uint16`
+        for 16 bits, :class:`numpy.uint32` for 32 bits, and
+        :class:`numpy.float64` for others.
+
+        Pixels are copied only once through :meth:`export_pixels()`.
+
+        .. _NumPy array interface:
+           http://docs.scipy.org/doc/numpy/reference/arrays.interface.html
+
+        .. versionadded:: 0.4.5
+
+        """
+        depth = self.depth
+        if depth <= 8:
+            storage, typestr = 'char', '|u1'
+        elif depth <= 16:
+            storage, typestr = 'short', NATIVE_BYTE_ORDER + 'u2'
+        elif depth <= 32:
+            storage, typestr = 'integer', NATIVE_BYTE_ORDER + 'u4'
+        else:
+            storage, typestr = 'double', NATIVE_BYTE_ORDER + 'f8'
+        channel_map = 'RGBA' if self.alpha_channel else 'RGB'
+        return {
+            'shape': (self.height, self.width, len(channel_map)),
+            'typestr': typestr,
+            'data': self.export_pixels(channel_map=channel_map,
+                                       storage=storage),
+            'version': 3
+        }
+
+    @manipulative
+    def import_pixels(self, data, x=0, y=0, width=None, height=None,
+                      channel_map='RGBA', storage='char'):
+        """Imports the packed pixels of the given rectangle from a single
+        contiguous buffer at once (:c:func:`MagickImportImagePixels`).
+        It's the reverse of :meth:`export_pixels()`::
+
+            rgba = img.export_pixels(channel_map='RGBA')
+            # manipulate rgba...
+            img.import_pixels(rgba, channel_map='RGBA')
+
+        :param data: the packed pixels in native byte order, row by row.
+                     any object which implements the buffer protocol
+                     can be used.  writable buffers like :class:`bytearray`
+                     aren't copied
+        :type data: :class:`bytes`, :class:`bytearray`, :class:`memoryview`
+        :param x: the x-offset of the rectangle.  default is 0
+        :type x: :class:`numbers.Integral`
+        :param y: the y-offset of the rectangle.  default is 0
+        :type y: :class:`numbers.Integral`
+        :param width: the width of the rectangle.
+                      default is the rest of the :attr:`width`
+        :type width: :class:`numbers.Integral`
+        :param height: the height of the rectangle.
+                       default is the rest of the :attr:`height`
+        :type height: :class:`numbers.Integral`
+        :param channel_map: the order of channels for each pixel
+                            e.g. ``'RGB'``, ``'BGRA'``, ``'I'``.
+                            see :const:`PIXEL_CHANNELS` also.
+                            default is ``'RGBA'``
+        :type channel_map: :class:`basestring`
+        :param storage: the type of each channel value.  one of ``'char'``,
+                        ``'short'``, ``'integer'``, ``'float'`` and
+                        ``'double'``.  default is ``'char'``
+        :type storage: :class:`basestring`
+        :raises ValueError: when the rectangle is out of the image,
+                            ``channel_map``/``storage`` is invalid,
+                            or ``data`` is too short
+
+        .. versionadded:: 0.4.5
+
+        """
+        x, y, width, height, channel_map, storage, size = self._pixel_region(
+            x, y, width, height, channel_map, storage
+        )
+        buffer, buffer_size = c_buffer(data)
+        if buffer_size < size:
+            raise ValueError('data must be at least {0} bytes, but it is '
+                             'only {1} bytes'.format(size, buffer_size))
+        r = library.MagickImportImagePixels(self.wand, x, y, width, height,
+                                            channel_map, storage, buffer)
+        if not r:
+            self.raise_exception()
+
+    @contextlib.contextmanager
+    def region(self, x=0, y=0, width=None, height=None,
+               channel_map='RGBA', storage=None, writable=True):
+        """Exposes the pixels of the given rectangle as a mutable packed
+        buffer inside of the :keyword:`with` block, and writes them back
+        to the image in bulk when the block exits.  Custom per-pixel
+        algorithms can run on the buffer e.g. with NumPy::
+
+            with img.region(channel_map='RGB', storage='char') as pixels:
+                array = numpy.frombuffer(pixels, numpy.uint8)
+                array[:] = lut[array]  # applies a lookup table in-place
+
+        If the block raises an exception, the pixels are not written back.
+        Parameters are the same as :meth:`export_pixels()`'s, except
+        ``storage``.
+
+        :param storage: the type of each channel value.  see
+                        :const:`STORAGE_TYPES`.  default is the smallest
+                        type which doesn't lose precision of the image
+                        when the pixels are written back: ``'char'`` for
+                        :attr:`depth` up to 8, ``'short'`` up to 16, and
+                        ``'double'`` for deeper images or HDRI builds of
+                        ImageMagick
+        :type storage: :class:`basestring`
+        :param writable: whether to write the buffer back to the image.
+                         :const:`False` makes it just a read-only region
+                         which is not written back.  default is
+                         :const:`True`
+        :type writable: :class:`bool`
+        :returns: the context manager that yields the packed pixels
+                  (:class:`bytearray`)
+
+        .. versionadded:: 0.4.5
+
+        """
+        if storage is None:
+            storage = self._lossless_storage()
+        pixels = self.export_pixels(x, y, width, height, channel_map,
+                                    storage)
+        yield pixels
+        if writable:
+            self.import_pixels(pixels, x, y, width, height, channel_map,
+                               storage)
+
+    def _lossless_storage(self):
+        """Gets the smallest storage type which holds pixels of the image
+        without losing precision.
+
+        """
+        if not is_hdri():
+            depth = self.depth
+            if depth <= 8:
+                return 'char'
+            elif depth <= 16:
+                return 'short'
+        return 'double'
+
     @manipulative
     def distort(self, method, arguments, best_fit=False):
         """Distorts an image using various distorting methods.
@@ -1655,6 +2302,76 @@ class BaseImage(Resource):
             if not r:
                 self.raise_exception()
 
+    def thumbnail(self, width=None, height=None):
+        """Makes the image a thumbnail which fits in the given ``width``
+        and ``height`` keeping its aspect ratio, and strips profiles
+        and comments from it (:c:func:`MagickThumbnailImage`).  It's
+        quicker than :meth:`resize()` for large reduction since it
+        samples the image down first, and then resizes it.  The image
+        never gets enlarged.
+
+        To thumbnail large JPEG images even quicker, read them with
+        ``decode_hint`` (see :meth:`Image.read()`) first::
+
+            with Image(filename='photo.jpg', decode_hint=(200, 200)) as img:
+                img.thumbnail(200, 200)
+
+        :param width: the maximum width of the thumbnail.
+                      default is no limit
+        :type width: :class:`numbers.Integral`
+        :param height: the maximum height of the thumbnail.
+                       default is no limit
+        :type height: :class:`numbers.Integral`
+
+        .. versionadded:: 0.4.5
+
+        """
+        self._thumbnail(*self._thumbnail_size(width, height))
+
+    def _thumbnail_size(self, width, height):
+        """Computes the size of the thumbnail which fits in the given
+        ``width`` and ``height`` keeping the aspect ratio.
+
+        """
+        if width is None and height is None:
+            raise TypeError('expected width or height')
+        ratios = []
+        for name, limit, size in (('width', width, self.width),
+                                  ('height', height, self.height)):
+            if limit is None:
+                continue
+            elif not isinstance(limit, numbers.Integral):
+                raise TypeError(name + ' must be a natural number, not ' +
+                                repr(limit))
+            elif limit < 1:
+                raise ValueError(name + ' must be a natural number, not ' +
+                                 repr(limit))
+            ratios.append(float(limit) / size)
+        ratio = min(ratios + [1.0])
+        return (max(1, int(round(self.width * ratio))),
+                max(1, int(round(self.height * ratio))))
+
+    @manipulative
+    def _thumbnail(self, width, height):
+        """Thumbnails the image exactly into the given ``width`` and
+        ``height``.
+
+        """
+        if self.animation:
+            self.wand = library.MagickCoalesceImages(self.wand)
+            library.MagickSetLastIterator(self.wand)
+            n = library.MagickGetIteratorIndex(self.wand)
+            library.MagickResetIterator(self.wand)
+            for i in xrange(n + 1):
+                library.MagickSetIteratorIndex(self.wand, i)
+                library.MagickThumbnailImage(self.wand, width, height)
+            library.MagickSetSize(self.wand, width, height)
+        else:
+            r = library.MagickThumbnailImage(self.wand, width, height)
+            library.MagickSetSize(self.wand, width, height)
+            if not r:
+                self.raise_exception()
+
     @manipulative
     def transform(self, crop='', resize=''):
         """Transforms the image using :c:func:`MagickTransformImage`,
@@ -2164,12 +2881,101 @@ class BaseImage(Resource):
             raise TypeError('metric must be a string, not ' + repr(metric))
 
         metric = COMPARE_METRICS.index(metric)
+        self.ensure_pixels()
+        image.ensure_pixels()
         distortion = ctypes.c_double()
         compared_image = library.MagickCompareImages(self.wand, image.wand,
                                                      metric,
                                                      ctypes.byref(distortion))
         return Image(BaseImage(compared_image)), distortion.value
 
+    def _fingerprint_pixels(self, width, height):
+        """Downsamples the current frame to ``width`` x ``height`` on
+        a copy, and then exports its intensities as a :class:`bytearray`
+        of rows.
+
+        """
+        self.ensure_pixels()
+        wand = library.MagickGetImage(self.wand)
+        if not wand:
+            self.raise_exception()
+        with BaseImage(wand) as image:
+            image.resize(width, height)
+            return image.export_pixels(channel_map='I', storage='char')
+
+    def dhash(self, size=8):
+        """Computes the difference hash of the image, the compact
+        fingerprint which is robust to scaling, compression and small
+        color changes.  Similar images have hashes with a small Hamming
+        distance (see :func:`wand.index.hamming_distance()`).  It's much
+        cheaper than :meth:`compare()` since images are compared only by
+        their hashes, which can be indexed by
+        :class:`wand.index.HashIndex`.
+
+        Each bit tells whether a pixel is brighter than its right neighbor
+        on the grayscale copy downsampled to ``(size + 1) x size``.
+        Only the current frame is hashed.
+
+        :param size: the number of bits of each row and column.
+                     default is 8, which makes a 64-bit hash
+        :type size: :class:`numbers.Integral`
+        :returns: the ``size * size``-bit hash
+        :rtype: :class:`numbers.Integral`
+
+        .. versionadded:: 0.4.5
+
+        """
+        if not isinstance(size, numbers.Integral):
+            raise TypeError('size must be an integer, not ' + repr(size))
+        elif size < 1:
+            raise ValueError('size must be positive, not ' + repr(size))
+        pixels = self._fingerprint_pixels(size + 1, size)
+        hash_ = 0
+        for y in xrange(size):
+            row = y * (size + 1)
+            for x in xrange(size):
+                hash_ = (hash_ << 1) | (pixels[row + x] > pixels[row + x + 1])
+        return hash_
+
+    def phash(self, size=8):
+        """Computes the perceptual hash of the image.  It's more robust
+        than :meth:`dhash()` to gamma and contrast changes, but slower.
+        Only the current frame is hashed.
+
+        Each bit tells whether a low frequency coefficient of the discrete
+        cosine transform of the grayscale copy downsampled to
+        ``(size * 4) x (size * 4)`` is greater than their median.
+
+        :param size: the number of low frequencies of each axis.
+                     default is 8, which makes a 64-bit hash
+        :type size: :class:`numbers.Integral`
+        :returns: the ``size * size``-bit hash
+        :rtype: :class:`numbers.Integral`
+
+        .. versionadded:: 0.4.5
+
+        """
+        if not isinstance(size, numbers.Integral):
+            raise TypeError('size must be an integer, not ' + repr(size))
+        elif size < 1:
+            raise ValueError('size must be positive, not ' + repr(size))
+        n = size * 4
+        pixels = self._fingerprint_pixels(n, n)
+        cosines = [[math.cos(math.pi / n * (i + 0.5) * k) for i in xrange(n)]
+                   for k in xrange(size)]
+        # The separable 2D DCT-II computing only the lowest frequencies:
+        # rows first, and then columns of them.
+        rows = [[sum(c * p for c, p in zip(cosine, pixels[y * n:y * n + n]))
+                 for cosine in cosines]
+                for y in xrange(n)]
+        coefficients = [sum(c * row[u] for c, row in zip(cosine, rows))
+                        for cosine in cosines for u in xrange(size)]
+        median = sorted(coefficients)[len(coefficients) // 2]
+        hash_ = 0
+        for coefficient in coefficients:
+            hash_ = (hash_ << 1) | (coefficient > median)
+        return hash_
+
     @manipulative
     def composite(self, image, left, top):
         """Places the supplied ``image`` over the current image, with the top
@@ -2574,6 +3380,10 @@ class BaseImage(Resource):
         )
         if getattr(self, 'c_resource', None) is None:
             return '<{0}: (closed)>'.format(typename)
+        elif self.pinged:
+            return '<{0}: (pinged){1}>'.format(
+                typename, extra_format.format(self=self)
+            )
         sig = self.signature
         if not sig:
             return '<{0}: (empty)>'.format(typename)
@@ -2612,6 +3422,12 @@ class Image(BaseImage):
                        useful for vectorial formats (like pdf)
     :type resolution: :class:`collections.Sequence`,
                       :Class:`numbers.Integral`
+    :param decode_hint: the ``(width, height)`` pair of the size the image
+                        will be scaled down to.  see :meth:`read()`
+    :type decode_hint: :class:`collections.Sequence`
+    :param use_mmap: whether to decode the ``filename`` from a memory
+                     mapping of the file.  see :meth:`read()`
+    :type use_mmap: :class:`bool`
 
     .. versionadded:: 0.1.5
        The ``file`` parameter.
@@ -2636,6 +3452,9 @@ class Image(BaseImage):
        with the ``filename``, ``file`` and ``blob`` parameters to load
        raw pixel data.
 
+    .. versionadded:: 0.4.5
+       The ``decode_hint`` and ``use_mmap`` parameters.
+
     .. describe:: [left:right, top:bottom]
 
        Crops the image by its ``left``, ``right``, ``top`` and ``bottom``,
@@ -2682,7 +3501,8 @@ class Image(BaseImage):
 
     def __init__(self, image=None, blob=None, file=None, filename=None,
                  format=None, width=None, height=None, depth=None,
-                 background=None, resolution=None):
+                 background=None, resolution=None, decode_hint=None,
+                 use_mmap=False):
         new_args = width, height, background, depth
         open_args = blob, file, filename
         if any(a is not None for a in new_args) and image is not None:
@@ -2698,6 +3518,9 @@ class Image(BaseImage):
             if not any(a is not None for a in open_args):
                 raise TypeError('format can only be used with the blob, file '
                                 'or filename parameter')
+        if not (decode_hint is None or any(a is not None for a in open_args)):
+            raise TypeError('decode_hint can only be used with the blob, file '
+                            'or filename parameter')
         if depth not in [None, 8, 16, 32]:
             raise ValueError('Depth must be 8, 16 or 32')
         with self.allocate():
@@ -2710,6 +3533,7 @@ class Image(BaseImage):
                                     'instance, not ' + repr(image))
                 wand = library.CloneMagickWand(image.wand)
                 super(Image, self).__init__(wand)
+                self.pinged = image.pinged
             elif any(a is not None for a in open_args):
                 if format:
                     format = binary(format)
@@ -2737,11 +3561,15 @@ class Image(BaseImage):
                         library.MagickSetFilename(self.wand,
                                                   b'buffer.' + format)
                 if file is not None:
-                    self.read(file=file, resolution=resolution)
+                    self.read(file=file, resolution=resolution,
+                              decode_hint=decode_hint)
                 elif blob is not None:
-                    self.read(blob=blob, resolution=resolution)
+                    self.read(blob=blob, resolution=resolution,
+                              decode_hint=decode_hint)
                 elif filename is not None:
-                    self.read(filename=filename, resolution=resolution)
+                    self.read(filename=filename, resolution=resolution,
+                              decode_hint=decode_hint,
+                              use_mmap=use_mmap)
                 # clear the wand format, otherwise any subsequent call to
                 # MagickGetImageBlob will silently change the image to this
                 # format again.
@@ -2768,11 +3596,158 @@ class Image(BaseImage):
             self.sequence.pop()
         super(Image, self).destroy()
 
-    def read(self, file=None, filename=None, blob=None, resolution=None):
+    def optimize_layers(self):
+        """Optimizes frames of the animation into layers, which store only
+        the area changed from the previous frame
+        (:c:func:`MagickOptimizeImageLayers`).  Frames are coalesced
+        first, so it can be used after any per-frame edit.  It often makes
+        animated GIF and WebP files much smaller.
+
+        .. versionadded:: 0.4.5
+
+        """
+        self.ensure_pixels()
+        coalesced = BaseImage(library.MagickCoalesceImages(self.wand))
+        with coalesced:
+            optimized = library.MagickOptimizeImageLayers(coalesced.wand)
+            if not optimized:
+                coalesced.raise_exception()
+        self.wand = optimized
+
+    def _optimize_layers(self):
+        """Same as :meth:`optimize_layers()` except it doesn't coalesce
+        frames, for frames already coalesced.
+
+        """
+        optimized = library.MagickOptimizeImageLayers(self.wand)
+        if not optimized:
+            self.raise_exception()
+        self.wand = optimized
+        self.sequence.instances = []
+
+    def optimize_transparency(self):
+        """Replaces pixels which don't change from the previous frame with
+        transparent pixels (:c:func:`MagickOptimizeImageTransparency`), so
+        that frames are compressed better.  It should be used after
+        :meth:`optimize_layers()`.
+
+        :raises wand.exceptions.WandLibraryVersionError:
+           when the installed ImageMagick doesn't support it
+
+        .. versionadded:: 0.4.5
+
+        """
+        if library.MagickOptimizeImageTransparency is None:
+            raise WandLibraryVersionError(
+                'the installed version of ImageMagick does not support '
+                'this feature'
+            )
+        self.ensure_pixels()
+        if not library.MagickOptimizeImageTransparency(self.wand):
+            self.raise_exception()
+
+    def optimized(self):
+        """Makes the copy of the image whose frames are optimized by
+        :meth:`optimize_layers()` and :meth:`optimize_transparency()`
+        (if it's supported).  It's what ``optimize=True`` of
+        :meth:`save()` and :meth:`make_blob()` encodes.
+
+        :returns: the optimized copy of the image
+        :rtype: :class:`Image`
+
+        .. versionadded:: 0.4.5
+
+        """
+        image = self.clone()
+        try:
+            image.optimize_layers()
+            if library.MagickOptimizeImageTransparency is not None:
+                image.optimize_transparency()
+        except:
+            image.close()
+            raise
+        return image
+
+    def map_frames(self, func, workers=None, optimize=True):
+        """Runs ``func`` on every frame of the image in parallel using
+        a pool of threads, and then reassembles the frames in order::
+
+            with Image(filename='animation.gif') as img:
+                img.map_frames(lambda frame: frame.resize(100, 100))
+                img.save(filename='thumbnail.gif')
+
+        Frames are coalesced first, so every frame is a full image
+        independent of others.  The delay and disposal of each frame
+        are preserved.  Since MagickWand API calls release the GIL,
+        frames are processed on multiple cores.
+
+        :param func: the function which manipulates a frame
+                     (:class:`BaseImage`) in-place.  it's called from
+                     multiple threads at once
+        :type func: :class:`collections.Callable`
+        :param workers: the number of threads.
+                        default is the number of CPUs
+        :type workers: :class:`numbers.Integral`
+        :param optimize: whether to optimize the reassembled frames
+                         into layers (:c:func:`MagickOptimizeImageLayers`)
+                         which store only changed areas of each frame.
+                         default is :const:`True`
+        :type optimize: :class:`bool`
+
+        .. versionadded:: 0.4.5
+
+        """
+        if not callable(func):
+            raise TypeError('func must be callable, not ' + repr(func))
+        self.ensure_pixels()
+        coalesced = BaseImage(library.MagickCoalesceImages(self.wand))
+        frames = []
+        with coalesced:
+            # MagickGetImage() clones only the current image, which shares
+            # pixels with the coalesced one until it's changed, so
+            # splitting frames doesn't copy pixels.
+            for i in xrange(library.MagickGetNumberImages(coalesced.wand)):
+                library.MagickSetIteratorIndex(coalesced.wand, i)
+                frames.append(
+                    BaseImage(library.MagickGetImage(coalesced.wand))
+                )
+        try:
+            def run(frame):
+                func(frame)
+                # Coalesced frames are placed at the origin of the canvas,
+                # and the canvas follows the size of the frame.
+                library.MagickSetImagePage(frame.wand, frame.width,
+                                           frame.height, 0, 0)
+            pool = multiprocessing.pool.ThreadPool(
+                workers or multiprocessing.cpu_count()
+            )
+            try:
+                pool.map(run, frames)
+            finally:
+                pool.close()
+                pool.join()
+            self.wand = library.NewMagickWand()
+            self.sequence.instances = []
+            for frame in frames:
+                library.MagickSetLastIterator(self.wand)
+                library.MagickAddImage(self.wand, frame.wand)
+        finally:
+            for frame in frames:
+                frame.destroy()
+        if optimize:
+            self._optimize_layers()
+
+    def read(self, file=None, filename=None, blob=None, resolution=None,
+             decode_hint=None, use_mmap=False):
         """Read new image into Image() object.
 
-        :param blob: reads an image from the ``blob`` byte array
-        :type blob: :class:`bytes`
+        :param blob: reads an image from the ``blob`` byte array.
+                     any object which implements the buffer protocol
+                     e.g. :class:`bytearray`, :class:`memoryview`,
+                     :class:`mmap.mmap` is passed to ImageMagick without
+                     copying it (except read-only ones other than
+                     :class:`bytes`)
+        :type blob: :class:`bytes`, :class:`bytearray`, :class:`memoryview`
         :param file: reads an image from the ``file`` object
         :type file: file object
         :param filename: reads an image from the ``filename`` string
@@ -2781,10 +3756,80 @@ class Image(BaseImage):
                            useful for vectorial formats (like PDF)
         :type resolution: :class:`collections.Sequence`,
                           :class:`numbers.Integral`
+        :param decode_hint: the ``(width, height)`` pair of the size
+                            the image will be scaled down to after reading.
+                            decoders which support it (e.g. JPEG's DCT
+                            scaling) decode the image directly into
+                            the smaller size which is not less than it,
+                            so that it takes much less memory and time.
+                            note that the read image is not exactly
+                            of this size; resize it afterward
+        :type decode_hint: :class:`collections.Sequence`
+        :param use_mmap: whether to map the file of the ``filename`` into
+                         memory and decode it as a blob, instead of
+                         letting ImageMagick read it.  it avoids copies of
+                         large files which are already in the page cache.
+                         default is :const:`False`
+        :type use_mmap: :class:`bool`
+
+        .. versionadded:: 0.4.5
+           The ``decode_hint``, ``use_mmap`` parameters, and buffer objects
+           as ``blob``.
 
         .. versionadded:: 0.3.0
 
         """
+        if use_mmap and filename is not None:
+            if not isinstance(filename, string_type):
+                raise TypeError('filename must be a string, not ' +
+                                repr(filename))
+            with map_file(filename) as mapped:
+                if mapped is not None:
+                    # the filename tells ImageMagick the format as well.
+                    library.MagickSetFilename(self.wand,
+                                              encode_filename(filename))
+                    self.read(blob=mapped, resolution=resolution,
+                              decode_hint=decode_hint)
+                    return
+        if decode_hint is None:
+            self._read(file, filename, blob, resolution, ping=False)
+            return
+        if not (isinstance(decode_hint, collections.Sequence) and
+                len(decode_hint) == 2 and
+                all(isinstance(v, numbers.Integral) and v > 0
+                    for v in decode_hint)):
+            raise TypeError('decode_hint must be a (width, height) pair of '
+                            'natural numbers, not ' + repr(decode_hint))
+        hint = binary('{0}x{1}'.format(*decode_hint))
+        previous = {}
+        for option in DECODE_HINT_OPTIONS:
+            previous[option] = library.MagickGetOption(self.wand, option)
+            library.MagickSetOption(self.wand, option, hint)
+        try:
+            self._read(file, filename, blob, resolution, ping=False)
+        finally:
+            # the hints must not affect images read later, so options
+            # the user set are restored.
+            for option, value in previous.items():
+                if value is None:
+                    library.MagickDeleteOption(self.wand, option)
+                else:
+                    library.MagickSetOption(self.wand, option, value)
+
+    def _read(self, file, filename, blob, resolution, ping):
+        """The actual implementation of :meth:`read()`.  If ``ping`` is
+        :const:`True` it reads only attributes of the image without its
+        pixels (:c:func:`MagickPingImage`) instead.
+
+        """
+        if ping:
+            read_image = library.MagickPingImage
+            read_blob = library.MagickPingImageBlob
+            read_file = library.MagickPingImageFile
+        else:
+            read_image = library.MagickReadImage
+            read_blob = library.MagickReadImageBlob
+            read_file = library.MagickReadImageFile
         r = None
         # Resolution must be set after image reading.
         if resolution is not None:
@@ -2800,7 +3845,7 @@ class Image(BaseImage):
             if (isinstance(file, file_types) and
                     hasattr(libc, 'fdopen') and hasattr(file, 'mode')):
                 fd = libc.fdopen(file.fileno(), file.mode)
-                r = library.MagickReadImageFile(self.wand, fd)
+                r = read_file(self.wand, fd)
             elif not callable(getattr(file, 'read', None)):
                 raise TypeError('file must be a readable file object'
                                 ', but the given object does not '
@@ -2809,17 +3854,25 @@ class Image(BaseImage):
                 blob = file.read()
                 file = None
         if blob is not None:
-            if not isinstance(blob, collections.Iterable):
-                raise TypeError('blob must be iterable, not ' +
-                                repr(blob))
-            if not isinstance(blob, binary_type):
+            try:
+                data, size = c_buffer(blob)
+            except TypeError:  # doesn't implement the buffer protocol
+                if not isinstance(blob, collections.Iterable):
+                    raise TypeError('blob must be iterable, not ' +
+                                    repr(blob))
                 blob = b''.join(blob)
-            r = library.MagickReadImageBlob(self.wand, blob, len(blob))
+                data, size = blob, len(blob)
+            r = read_blob(self.wand, data, size)
+            # releases the export of the buffer, e.g. a mmap can't be
+            # closed while it's exported.
+            del data
         elif filename is not None:
             filename = encode_filename(filename)
-            r = library.MagickReadImage(self.wand, filename)
+            r = read_image(self.wand, filename)
         if not r:
             self.raise_exception()
+        if ping:
+            self.pinged = True
 
     def close(self):
         """Closes the image explicitly. If you use the image object in
@@ -2841,6 +3894,7 @@ class Image(BaseImage):
 
         """
         library.ClearMagickWand(self.wand)
+        self.pinged = False
 
     def level(self, black=0.0, white=None, gamma=1.0, channel=None):
         """Adjusts the levels of an image by scaling the colors falling
@@ -3012,6 +4066,150 @@ class Image(BaseImage):
                 self.raise_exception()
         return self
 
+    @classmethod
+    def from_array(cls, array, channel_map=None):
+        """Creates an image from the array which implements the NumPy
+        array interface e.g. :class:`numpy.ndarray`.  NumPy itself isn't
+        required; any object that has ``__array_interface__`` works::
+
+            with Image.from_array(numpy.zeros((480, 640, 3), 'uint8')) as img:
+                assert img.size == (640, 480)
+
+        The array has to be C-contiguous, and its shape has to be
+        ``height x width`` or ``height x width x channels``.  Pixels are
+        read from the array's memory directly, so it's copied only once
+        into the image.
+
+        :param array: the array of pixels.  the type of its values has to be
+                      one of :class:`numpy.uint8`, :class:`numpy.uint16`,
+                      :class:`numpy.uint32`, :class:`numpy.float32`, and
+                      :class:`numpy.float64`.  floats are in ``0.0``--``1.0``
+        :param channel_map: the order of channels for each pixel.
+                            see :const:`PIXEL_CHANNELS` also.
+                            default is ``'I'``, ``'IA'``, ``'RGB'`` or
+                            ``'RGBA'`` for 1, 2, 3 or 4 channels
+        :type channel_map: :class:`basestring`
+        :returns: a new image
+        :rtype: :class:`Image`
+        :raises ValueError: when the array's shape, type or memory layout
+                            is unsupported
+
+        .. versionadded:: 0.4.5
+
+        """
+        try:
+            interface = array.__array_interface__
+        except AttributeError:
+            raise TypeError('array must implement the array interface, not ' +
+                            repr(array))
+        shape = tuple(interface['shape'])
+        if len(shape) == 2:
+            height, width = shape
+            channels = 1
+        elif len(shape) == 3:
+            height, width, channels = shape
+        else:
+            raise ValueError('array must be 2 or 3-dimensional, not ' +
+                             repr(shape))
+        if channels < 1 or height < 1 or width < 1:
+            raise ValueError('array cannot have an empty dimension: ' +
+                             repr(shape))
+        if interface.get('strides') is not None:
+            raise ValueError('array must be C-contiguous; use '
+                             'numpy.ascontiguousarray() first')
+        typestr = interface['typestr']
+        if typestr[0] not in ('|', '=', NATIVE_BYTE_ORDER):
+            raise ValueError('array must be in the native byte order, not ' +
+                             repr(typestr))
+        try:
+            storage = ARRAY_STORAGE_TYPES[typestr[1:]]
+        except KeyError:
+            raise ValueError('unsupported array type: ' + repr(typestr))
+        if channel_map is None:
+            try:
+                channel_map = ('I', 'IA', 'RGB', 'RGBA')[channels - 1]
+            except IndexError:
+                raise ValueError('channel_map must be given for {0} '
+                                 'channels'.format(channels))
+        elif len(channel_map) != channels:
+            raise ValueError('channel_map {0!r} does not match {1} '
+                             'channels'.format(channel_map, channels))
+        data = interface['data']
+        if isinstance(data, tuple):
+            data = data[0]  # a pair of (address, read-only flag)
+        else:
+            data, _ = c_buffer(data)
+        image = cls(width=width, height=height, background=Color('black'))
+        try:
+            x, y, width, height, channel_map, storage, _ = \
+                image._pixel_region(0, 0, width, height,
+                                    channel_map, storage)
+            if storage != STORAGE_TYPES.index('char'):
+                image.depth = STORAGE_SIZES[STORAGE_TYPES[storage]] * 8
+            r = library.MagickImportImagePixels(image.wand, x, y,
+                                                width, height,
+                                                channel_map, storage, data)
+            if not r:
+                image.raise_exception()
+        except:
+            image.close()
+            raise
+        return image
+
+    @classmethod
+    def ping(cls, file=None, filename=None, blob=None, resolution=None,
+             format=None):
+        """Reads only attributes of the image e.g. :attr:`size`,
+        :attr:`format`, :attr:`mimetype`, :attr:`metadata` and
+        the number of frames (``len(image.sequence)``) without decoding
+        its pixels (:c:func:`MagickPingImage`).  It's much cheaper
+        than reading the whole image::
+
+            with Image.ping(filename='upload.jpg') as img:
+                print(img.format, img.size, len(img.sequence))
+
+        Since the pinged image has no pixels, any operations on its
+        pixels raise :exc:`PingedImageError`.  Parameters are the same
+        as :class:`Image`'s.
+
+        :param file: pings an image from the ``file`` object
+        :type file: file object
+        :param filename: pings an image from the ``filename`` string
+        :type filename: :class:`basestring`
+        :param blob: pings an image from the ``blob`` byte array
+        :type blob: :class:`bytes`
+        :param resolution: set a resolution value (DPI),
+                           useful for vectorial formats (like PDF)
+        :type resolution: :class:`collections.Sequence`,
+                          :class:`numbers.Integral`
+        :param format: forces the format of the image to ping
+        :type format: :class:`basestring`
+        :returns: a new image that has no pixels
+        :rtype: :class:`Image`
+
+        .. versionadded:: 0.4.5
+
+        """
+        if sum(a is not None for a in (file, filename, blob)) != 1:
+            raise TypeError('expected exactly one of file, filename and '
+                            'blob parameters')
+        if not (format is None or isinstance(format, string_type)):
+            raise TypeError('format must be a string, not ' + repr(format))
+        image = cls()
+        try:
+            if format:
+                format = binary(format)
+                library.MagickSetFormat(image.wand, format)
+                if not filename:
+                    library.MagickSetFilename(image.wand, b'buffer.' + format)
+            image._read(file, filename, blob, resolution, ping=True)
+            # clear the wand format as the constructor does.
+            library.MagickSetFormat(image.wand, binary(''))
+        except:
+            image.close()
+            raise
+        return image
+
     def convert(self, format):
         """Converts the image format with the original image maintained.
         It returns a converted image instance which is new. ::
@@ -3032,7 +4230,53 @@ class Image(BaseImage):
         cloned.format = format
         return cloned
 
-    def save(self, file=None, filename=None):
+    def make_variants(self, sizes):
+        """Makes thumbnails of the image for each of the given sizes at once.
+        Each thumbnail fits in its ``(width, height)`` keeping the aspect
+        ratio like :meth:`thumbnail()`.
+
+        Thumbnails are made progressively from the largest to the smallest,
+        so that each one is made from the previous smaller thumbnail
+        instead of the original image::
+
+            names = 'large', 'medium', 'small'
+            variants = img.make_variants([(800, 800), (480, 480), (240, 240)])
+            for name, variant in zip(names, variants):
+                with variant:
+                    variant.save(filename=name + '.png')
+
+        :param sizes: the list of ``(width, height)`` pairs.  either of
+                      each pair can be :const:`None` which means no limit
+        :type sizes: :class:`collections.Sequence`
+        :returns: the list of new thumbnail images in the same order
+                  to ``sizes``.  they should be closed by the caller
+        :rtype: :class:`list`
+
+        .. versionadded:: 0.4.5
+
+        """
+        self.ensure_pixels()
+        sizes = [self._thumbnail_size(width, height)
+                 for width, height in sizes]
+        order = sorted(xrange(len(sizes)),
+                       key=lambda i: sizes[i][0] * sizes[i][1],
+                       reverse=True)
+        variants = [None] * len(sizes)
+        previous = self
+        try:
+            for i in order:
+                variant = previous.clone()
+                variants[i] = variant
+                variant._thumbnail(*sizes[i])
+                previous = variant
+        except:
+            for variant in variants:
+                if variant is not None:
+                    variant.close()
+            raise
+        return variants
+
+    def save(self, file=None, filename=None, optimize=False):
         """Saves the image into the ``file`` or ``filename``. It takes
         only one argument at a time.
 
@@ -3040,6 +4284,13 @@ class Image(BaseImage):
         :type file: file object
         :param filename: a filename string to write to
         :type filename: :class:`basestring`
+        :param optimize: whether to optimize frames of multi-frame images
+                         e.g. animated GIF before saving.
+                         see :meth:`optimized()`.  default is :const:`False`
+        :type optimize: :class:`bool`
+
+        .. versionadded:: 0.4.5
+           The ``optimize`` parameter.
 
         .. versionadded:: 0.1.5
            The ``file`` parameter.
@@ -3051,7 +4302,12 @@ class Image(BaseImage):
             raise TypeError('expected an argument')
         elif file is not None and filename is not None:
             raise TypeError('expected only one argument; but two passed')
-        elif file is not None:
+        self.ensure_pixels()
+        if optimize and len(self.sequence) > 1:
+            with self.optimized() as optimized:
+                optimized.save(file=file, filename=filename)
+            return
+        if file is not None:
             if isinstance(file, string_type):
                 raise TypeError('file must be a writable file object, '
                                 'but {0!r} is a string; did you want '
@@ -3083,16 +4339,41 @@ class Image(BaseImage):
             if not r:
                 self.raise_exception()
 
-    def make_blob(self, format=None):
+    def make_blob(self, format=None, copy=True, optimize=False):
         """Makes the binary string of the image.
 
+        If ``copy`` is :const:`False` it returns a :class:`memoryview` over
+        the buffer ImageMagick allocated instead of copying it into
+        a :class:`bytes` string (a :class:`buffer` on Python 2.6, which
+        lacks :class:`memoryview`).  The buffer is freed when the last view
+        on it is released.  It can be passed to anything that takes
+        buffers e.g. :meth:`socket.socket.sendall()`,
+        :meth:`io.RawIOBase.write()`::
+
+            blob = img.make_blob('tiff', copy=False)
+            try:
+                connection.sendall(blob)
+            finally:
+                blob.release()  # or just del blob
+
         :param format: the image format to write e.g. ``'png'``, ``'jpeg'``.
                        it is omittable
         :type format: :class:`basestring`
+        :param copy: whether to copy the encoded blob into :class:`bytes`.
+                     :const:`False` avoids a copy by returning
+                     :class:`memoryview` instead.  default is :const:`True`
+        :type copy: :class:`bool`
+        :param optimize: whether to optimize frames of multi-frame images
+                         e.g. animated GIF before encoding.
+                         see :meth:`optimized()`.  default is :const:`False`
+        :type optimize: :class:`bool`
         :returns: a blob (bytes) string
-        :rtype: :class:`bytes`
+        :rtype: :class:`bytes`, :class:`memoryview`
         :raises ValueError: when ``format`` is invalid
 
+        .. versionadded:: 0.4.5
+           The ``copy`` and ``optimize`` parameters.
+
         .. versionchanged:: 0.1.6
            Removed a side effect that changes the image :attr:`format`
            silently.
@@ -3103,9 +4384,13 @@ class Image(BaseImage):
         .. versionadded:: 0.1.1
 
         """
+        self.ensure_pixels()
+        if optimize and len(self.sequence) > 1:
+            with self.optimized() as optimized:
+                return optimized.make_blob(format, copy=copy)
         if format is not None:
             with self.convert(format) as converted:
-                return converted.make_blob()
+                return converted.make_blob(copy=copy)
         library.MagickResetIterator(self.wand)
         length = ctypes.c_size_t()
         blob_p = None
@@ -3116,6 +4401,17 @@ class Image(BaseImage):
             blob_p = library.MagickGetImageBlob(self.wand,
                                                 ctypes.byref(length))
         if blob_p and length.value:
+            if not copy:
+                data = (ctypes.c_ubyte * length.value).from_address(
+                    ctypes.addressof(blob_p.contents)
+                )
+                # The buffer owns the memory, and relinquishes it when
+                # it's collected, i.e., the last view on it is released.
+                data.owner = ctypes.cast(blob_p, c_magick_char_p)
+                try:
+                    return memoryview(data)
+                except NameError:  # Python 2.6 has no memoryview
+                    return buffer(data)  # noqa
             blob = ctypes.string_at(blob_p, length.value)
             library.MagickRelinquishMemory(blob_p)
             return blob
@@ -3380,6 +4676,85 @@ class Image(BaseImage):
         )
 
 
+def iter_frames(file=None, filename=None, blob=None, resolution=None,
+                format=None):
+    """Reads frames (pages) of a multi-frame image e.g. PDF, multi-page
+    TIFF one by one, instead of decoding all of them at once.  Each frame
+    is a standalone :class:`Image`, and it's closed before the next one is
+    read, so that memory usage doesn't grow with the number of frames::
+
+        for i, page in enumerate(iter_frames(filename='scan.pdf',
+                                             resolution=150)):
+            page.save(filename='page-{0}.png'.format(i))
+
+    Clone the yielded image to keep it.  The number of frames is
+    counted by :meth:`Image.ping()` first, and then each frame is read
+    using ImageMagick's subimage syntax e.g. ``scan.pdf[3]``.
+    A ``file`` object is read into a blob first.
+
+    :param file: reads frames from the ``file`` object
+    :type file: file object
+    :param filename: reads frames from the ``filename`` string
+    :type filename: :class:`basestring`
+    :param blob: reads frames from the ``blob`` byte array
+    :type blob: :class:`bytes`
+    :param resolution: set a resolution value (DPI),
+                       useful for vectorial formats (like PDF)
+    :type resolution: :class:`collections.Sequence`,
+                      :class:`numbers.Integral`
+    :param format: forces the format of the image to read
+    :type format: :class:`basestring`
+    :returns: the iterator of frames
+    :rtype: :class:`collections.Iterator`
+
+    .. versionadded:: 0.4.5
+
+    """
+    if sum(a is not None for a in (file, filename, blob)) != 1:
+        raise TypeError('expected exactly one of file, filename and '
+                        'blob parameters')
+    elif not (format is None or isinstance(format, string_type)):
+        raise TypeError('format must be a string, not ' + repr(format))
+    elif filename is not None and not isinstance(filename, string_type):
+        raise TypeError('filename must be a string, not ' + repr(filename))
+    if file is not None:
+        if not callable(getattr(file, 'read', None)):
+            raise TypeError('file must be a readable file object, '
+                            'but the given object does not have read() '
+                            'method')
+        blob = file.read()
+    with Image.ping(filename=filename, blob=blob, resolution=resolution,
+                    format=format) as pinged:
+        length = len(pinged.sequence)
+
+    def iterate():
+        for index in xrange(length):
+            image = Image()
+            try:
+                if filename is not None:
+                    subimage = text(filename) + '[{0}]'.format(index)
+                    if format:
+                        subimage = text(format) + ':' + subimage
+                    image.read(filename=subimage, resolution=resolution)
+                else:
+                    # The subimage syntax works on the filename of
+                    # the wand when a blob is read as well.
+                    subimage = '[{0}]'.format(index)
+                    if format:
+                        library.MagickSetFormat(image.wand, binary(format))
+                        subimage = 'buffer.' + format + subimage
+                    library.MagickSetFilename(image.wand, binary(subimage))
+                    image.read(blob=blob, resolution=resolution)
+                # clear the wand format as the constructor does.
+                library.MagickSetFormat(image.wand, binary(''))
+            except:
+                image.close()
+                raise
+            with image:
+                yield image
+    return iterate()
+
+
 class Iterator(Resource, collections.Iterator):
     """Row iterator for :class:`Image`. It shouldn't be instantiated
     directly; instead, it can be acquired through :class:`Image` instance::
@@ -3663,49 +5038,202 @@ class ChannelDepthDict(ImageProperty, collections.Mapping):
         return int(depth)
 
 
+class ChannelStatisticsDict(collections.Mapping):
+    """The mapping of channels to their statistics, which are
+    :class:`~wand.api.ChannelStatistics` structures having the following
+    fields in quantum scale (from 0 to
+    :const:`~wand.version.QUANTUM_RANGE`):
+
+    - ``depth``
+    - ``minima``, ``maxima``
+    - ``mean``, ``variance``, ``standard_deviation``
+    - ``kurtosis``, ``skewness``
+    - ``entropy`` (NaN if ImageMagick is older than 6.9.0)
+
+    Keys are ``'red'``, ``'green'``, ``'blue'``, ``'alpha'`` (only if
+    the image has an alpha channel), ``'black'`` (only for CMYK images),
+    and ``'composite_channels'``.  Aliases in :const:`CHANNELS` e.g.
+    ``'gray'``, ``'cyan'`` also can be looked up.
+
+    All statistics are copied from a single call of
+    :c:func:`MagickGetImageChannelStatistics()`.
+
+    :param image: an image instance
+    :type image: :class:`BaseImage`
+
+    .. note::
+
+       You don't have to use this by yourself.
+       Use :attr:`Image.statistics <BaseImage.statistics>` property instead.
+
+    .. versionadded:: 0.4.5
+
+    """
+
+    def __init__(self, image):
+        channels = ['red', 'green', 'blue']
+        if image.alpha_channel:
+            channels.append('alpha')
+        if image.colorspace == 'cmyk':
+            channels.append('black')
+        channels.append('composite_channels')
+        self.channels = channels
+        self.statistics = {}
+        has_entropy = MAGICK_VERSION_INFO >= (6, 9, 0)
+        stride = ctypes.sizeof(ChannelStatistics)
+        if not has_entropy:
+            stride -= ctypes.sizeof(ctypes.c_double)
+        address = library.MagickGetImageChannelStatistics(image.wand)
+        if not address:
+            image.raise_exception()
+        try:
+            for channel in channels:
+                c = CHANNELS[channel]
+                data = ctypes.string_at(address + c * stride, stride)
+                data = data.ljust(ctypes.sizeof(ChannelStatistics), b'\0')
+                statistics = ChannelStatistics.from_buffer_copy(data)
+                if not has_entropy:
+                    statistics.entropy = float('nan')
+                self.statistics[c] = statistics
+        finally:
+            library.MagickRelinquishMemory(address)
+
+    def __iter__(self):
+        return iter(self.channels)
+
+    def __len__(self):
+        return len(self.channels)
+
+    def __getitem__(self, channel):
+        return self.statistics[CHANNELS[channel]]
+
+
 class HistogramDict(collections.Mapping):
     """Specialized mapping object to represent color histogram.
     Keys are colors, and values are the number of pixels.
 
+    Its length is the number of colors ImageMagick counts, without
+    merging fully transparent colors, so it's known without making
+    any :class:`~wand.color.Color`.
+
+    Colors and counts are copied out of the histogram of ImageMagick
+    when it's made, so it doesn't hold any resource of the image.
+
     :param image: the image to get its histogram
     :type image: :class:`BaseImage`
 
     .. versionadded:: 0.3.0
 
+    .. versionchanged:: 0.4.5
+       Colors are no more formatted to strings, and the pixel wands of
+       the histogram are destroyed immediately.
+
     """
 
     def __init__(self, image):
-        self.size = ctypes.c_size_t()
-        self.pixels = library.MagickGetImageHistogram(
-            image.wand,
-            ctypes.byref(self.size)
-        )
+        size = ctypes.c_size_t()
+        pixels = library.MagickGetImageHistogram(image.wand,
+                                                 ctypes.byref(size))
+        #: (:class:`ctypes.Array`) The array of
+        #: :class:`~wand.api.MagickPixelPacket` of colors.
+        self.packets = (MagickPixelPacket * size.value)()
+        #: (:class:`ctypes.Array`) The array of :class:`ctypes.c_size_t`
+        #: of the number of pixels of each color in :attr:`packets`.
+        self.pixel_counts = (ctypes.c_size_t * size.value)()
+        if not pixels:
+            self.counts = {}
+            return
+        try:
+            address = ctypes.addressof(self.packets)
+            packet_size = ctypes.sizeof(MagickPixelPacket)
+            get_color = library.PixelGetMagickColor
+            get_count = library.PixelGetColorCount
+            for i in xrange(size.value):
+                get_color(pixels[i], address + i * packet_size)
+                self.pixel_counts[i] = get_count(pixels[i])
+        finally:
+            library.DestroyPixelWands(pixels, size.value)
         self.counts = None
 
-    def __len__(self):
+    def colors(self):
+        """Yields colors in the histogram in order of :attr:`packets`.
+        Unlike iterating the mapping, fully transparent colors aren't
+        merged.
+
+        :returns: the iterator of colors
+        :rtype: :class:`collections.Iterator`
+
+        .. versionadded:: 0.4.5
+
+        """
+        address = ctypes.addressof(self.packets)
+        packet_size = ctypes.sizeof(MagickPixelPacket)
+        for i in xrange(len(self.packets)):
+            raw = ctypes.create_string_buffer(packet_size)
+            ctypes.memmove(raw, address + i * packet_size, packet_size)
+            yield Color(raw=raw)
+
+    def as_arrays(self):
+        """Gets the histogram as a pair of packed arrays, which is much
+        faster than the mapping for images having lots of colors.
+        They can be wrapped by :func:`numpy.frombuffer()` without copy::
+
+            colors, counts = img.histogram.as_arrays()
+            rgba = numpy.frombuffer(colors, dtype=numpy.double)
+            rgba = rgba.reshape((-1, 4))
+
+        :returns: the ``(colors, counts)`` pair.  ``colors`` is the array
+                  of doubles packing ``red, green, blue, alpha`` from
+                  0.0 to 1.0 for each color, and ``counts`` is the array
+                  of :c:type:`size_t` (see :const:`SIZE_T_TYPECODE`)
+                  of the number of pixels of each color
+        :rtype: :class:`tuple`
+
+        .. versionadded:: 0.4.5
+
+        """
+        n = len(self.packets)
+        # Each packet is a struct of doubles except its header, so the
+        # fields are sliced out of the packets viewed as doubles.
+        doubles = array_from_ctypes('d', self.packets)
+        stride = ctypes.sizeof(MagickPixelPacket) // doubles.itemsize
+        colors = array.array('d', [0.0]) * (n * 4)
+        for i, field in enumerate(('red', 'green', 'blue', 'opacity')):
+            offset = getattr(MagickPixelPacket, field).offset
+            colors[i::4] = doubles[offset // doubles.itemsize::stride]
+        quantum_range = itertools.repeat(QUANTUM_RANGE)
+        colors = array.array('d', map(operator.truediv, colors,
+                                      quantum_range))
+        colors[3::4] = array.array(
+            'd', map(operator.sub, itertools.repeat(1.0, n), colors[3::4])
+        )
+        counts = array_from_ctypes(SIZE_T_TYPECODE, self.pixel_counts)
+        return colors, counts
+
+    def get_counts(self):
+        """Gets the :class:`dict` of colors to the number of pixels.
+        Colors equal to each other (e.g. fully transparent colors) are
+        merged.  It's made only once.
+
+        """
         if self.counts is None:
-            return self.size.value
-        return len(self.counts)
+            counts = {}
+            pixel_counts = self.pixel_counts
+            for i, color in enumerate(self.colors()):
+                counts[color] = counts.get(color, 0) + pixel_counts[i]
+            self.counts = counts
+        return self.counts
+
+    def __len__(self):
+        return len(self.packets)
 
     def __iter__(self):
-        if self.counts is None:
-            pixels = self.pixels
-            string = library.PixelGetColorAsString
-            return (Color(string(pixels[i]).value)
-                    for i in xrange(self.size.value))
-        return iter(Color(string=c) for c in self.counts)
+        return iter(self.get_counts())
 
     def __getitem__(self, color):
-        if self.counts is None:
-            string = library.PixelGetColorAsNormalizedString
-            pixels = self.pixels
-            count = library.PixelGetColorCount
-            self.counts = dict(
-                (text(string(pixels[i]).value), count(pixels[i]))
-                for i in xrange(self.size.value)
-            )
-            del self.size, self.pixels
-        return self.counts[color.normalized_string]
+        if not isinstance(color, Color):
+            raise KeyError(color)
+        return self.get_counts()[color]
 
 
 class ClosedImageError(DestroyedResourceError):
@@ -3713,3 +5241,13 @@ class ClosedImageError(DestroyedResourceError):
     image.
 
     """
+
+
+class PingedImageError(TypeError):
+    """An error that rises when some code tries to access or manipulate
+    pixels of the image read by :meth:`Image.ping()`, which has
+    no pixels.
+
+    .. versionadded:: 0.4.5
+
+    """
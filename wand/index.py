@@ -0,0 +1,142 @@
+""":mod:`wand.index` --- Indices of image hashes
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module finds near-duplicate images by their perceptual hashes
+(:meth:`~wand.image.BaseImage.phash()` or
+:meth:`~wand.image.BaseImage.dhash()`) without comparing every pair of
+images::
+
+    from wand.image import Image
+    from wand.index import HashIndex
+
+    index = HashIndex()
+    for filename in filenames:
+        with Image(filename=filename) as img:
+            index.add(img.phash(), filename)
+
+    with Image(filename='query.jpg') as img:
+        for distance, hash_, filename in index.search(img.phash(), 6):
+            print(filename, distance)
+
+It doesn't depend on the MagickWand API at all.
+
+.. versionadded:: 0.4.5
+
+"""
+import numbers
+
+__all__ = 'HashIndex', 'hamming_distance'
+
+
+def hamming_distance(a, b):
+    """Counts different bits of two hashes.
+
+    :param a: a hash
+    :type a: :class:`numbers.Integral`
+    :param b: another hash
+    :type b: :class:`numbers.Integral`
+    :returns: the number of different bits
+    :rtype: :class:`numbers.Integral`
+    :raises ValueError: when a hash is negative
+
+    """
+    check_hash('a', a)
+    check_hash('b', b)
+    return bin(a ^ b).count('1')
+
+
+def check_hash(name, hash_):
+    """Raises :exc:`TypeError` or :exc:`ValueError` if ``hash_`` is not
+    a non-negative integer.  Negative integers have a minus sign instead
+    of two's complement bits, so they can't be compared bit by bit.
+
+    .. note::
+
+       It's only for internal use.
+
+    """
+    if not isinstance(hash_, numbers.Integral):
+        raise TypeError(name + ' must be an integer, not ' + repr(hash_))
+    elif hash_ < 0:
+        raise ValueError(name + ' cannot be negative, not ' + repr(hash_))
+
+
+class HashIndex(object):
+    """The index of hashes which finds hashes within a Hamming distance
+    from a hash.  It's a BK-tree, so a search visits only a small part of
+    the index when the distance is small.
+
+    Each hash can have several values e.g. filenames of images having
+    the same hash.
+
+    .. describe:: len(index)
+
+       The number of added ``(hash, value)`` pairs.
+
+    """
+
+    def __init__(self):
+        # Each node is a [hash, values, children] list, and children is
+        # a dict of distances to child nodes.
+        self.root = None
+        self.size = 0
+
+    def add(self, hash_, value=None):
+        """Adds the ``hash_`` and its ``value`` to the index.
+
+        :param hash_: the hash
+        :type hash_: :class:`numbers.Integral`
+        :param value: the value of the hash e.g. the image's filename
+        :raises ValueError: when ``hash_`` is negative
+
+        """
+        check_hash('hash_', hash_)
+        self.size += 1
+        if self.root is None:
+            self.root = [hash_, [value], {}]
+            return
+        node = self.root
+        while True:
+            distance = bin(hash_ ^ node[0]).count('1')
+            if distance == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [hash_, [value], {}]
+                return
+            node = child
+
+    def search(self, hash_, distance):
+        """Finds hashes within the ``distance`` from the ``hash_``.
+
+        :param hash_: the hash to find near ones
+        :type hash_: :class:`numbers.Integral`
+        :param distance: the maximum Hamming distance
+        :type distance: :class:`numbers.Integral`
+        :returns: the list of ``(distance, hash, value)`` triples,
+                  nearest first
+        :rtype: :class:`list`
+
+        """
+        check_hash('hash_', hash_)
+        if not isinstance(distance, numbers.Integral):
+            raise TypeError('distance must be an integer, not ' +
+                            repr(distance))
+        results = []
+        nodes = [self.root] if self.root is not None else []
+        while nodes:
+            node = nodes.pop()
+            d = bin(hash_ ^ node[0]).count('1')
+            if d <= distance:
+                results.extend((d, node[0], value) for value in node[1])
+            # By the triangle inequality, only children in
+            # [d - distance, d + distance] can be within the distance.
+            for child_distance, child in node[2].items():
+                if d - distance <= child_distance <= d + distance:
+                    nodes.append(child)
+        results.sort(key=lambda result: result[:2])
+        return results
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,338 @@
+""":mod:`wand.pipeline` --- Lazy pipelines of operations
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+A :class:`Pipeline` records operations on an image instead of running
+them immediately, and then removes redundant ones before running them
+at once::
+
+    with img.pipeline().resize(800, 600).crop(0, 0, 400, 300) \\
+            .resize(200, 150).strip().strip().format('webp') \\
+            .execute() as thumbnail:
+        thumbnail.save(filename='thumbnail.webp')
+
+The above pipeline actually runs only the following operations on a clone
+of the image:
+
+1. ``strip()``
+2. ``crop(0, 0, width=img.width // 2, height=img.height // 2)``
+   (if it's exactly mappable onto the original image)
+3. ``resize(200, 150)``
+
+.. versionadded:: 0.4.5
+
+"""
+import numbers
+
+from .compat import string_type
+
+__all__ = 'OPTIMIZABLE_OPERATIONS', 'Pipeline'
+
+
+#: (:class:`frozenset`) The names of operations :class:`Pipeline` can
+#: optimize.  Other operations are run as they are recorded, and
+#: operations before and after them are optimized separately.
+OPTIMIZABLE_OPERATIONS = frozenset(['crop', 'resize', 'sample', 'strip'])
+
+
+class Pipeline(object):
+    """The lazy pipeline of operations on the ``image``.  Use
+    :meth:`BaseImage.pipeline() <wand.image.BaseImage.pipeline>` instead
+    of instantiating it.
+
+    Calling any method of :class:`~wand.image.Image` that manipulates
+    the image in-place on it appends the operation to the pipeline, and
+    returns the pipeline itself.  Operations in
+    :const:`OPTIMIZABLE_OPERATIONS` are optimized as follows:
+
+    - Consecutive :meth:`~wand.image.BaseImage.resize()` (or
+      :meth:`~wand.image.BaseImage.sample()`) operations are merged into
+      the last one.
+    - Consecutive :meth:`~wand.image.BaseImage.crop()` operations are
+      merged into one.
+    - :meth:`~wand.image.BaseImage.crop()` after
+      :meth:`~wand.image.BaseImage.resize()` is moved before the resize
+      if the cropped area is exactly mappable onto the image before
+      resizing, so that fewer pixels are resized.  Pixels at the edges of
+      the result may slightly differ since they are filtered without
+      their cropped-out neighbors.
+    - :meth:`~wand.image.Image.strip()` runs only once.
+
+    The original image is never changed.
+
+    :param image: the image to run operations on
+    :type image: :class:`~wand.image.BaseImage`
+
+    """
+
+    def __init__(self, image):
+        self.image = image
+        #: (:class:`list`) The list of recorded ``(name, args, kwargs)``
+        #: triples.
+        self.operations = []
+        #: (:class:`basestring`) The format to encode the result to.
+        #: set by :meth:`format()`.
+        self.target_format = None
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not callable(getattr(self.image, name,
+                                                        None)):
+            raise AttributeError(name)
+
+        def append(*args, **kwargs):
+            self.operations.append((name, args, kwargs))
+            return self
+        return append
+
+    def resize(self, width=None, height=None, filter='undefined', blur=1):
+        """Records :meth:`~wand.image.BaseImage.resize()`."""
+        self.operations.append(('resize', (), {
+            'width': width, 'height': height, 'filter': filter, 'blur': blur
+        }))
+        return self
+
+    def sample(self, width=None, height=None):
+        """Records :meth:`~wand.image.BaseImage.sample()`."""
+        self.operations.append(('sample', (), {
+            'width': width, 'height': height
+        }))
+        return self
+
+    def crop(self, left=0, top=0, right=None, bottom=None,
+             width=None, height=None, reset_coords=True, gravity=None):
+        """Records :meth:`~wand.image.BaseImage.crop()`."""
+        self.operations.append(('crop', (), {
+            'left': left, 'top': top, 'right': right, 'bottom': bottom,
+            'width': width, 'height': height, 'reset_coords': reset_coords,
+            'gravity': gravity
+        }))
+        return self
+
+    def strip(self):
+        """Records :meth:`~wand.image.Image.strip()`."""
+        self.operations.append(('strip', (), {}))
+        return self
+
+    def format(self, format):
+        """Sets the format to encode the result to.  Only the last one
+        takes effect.
+
+        :param format: the image format e.g. ``'png'``, ``'webp'``
+        :type format: :class:`basestring`
+
+        """
+        if not isinstance(format, string_type):
+            raise TypeError('format must be a string, not ' + repr(format))
+        self.target_format = format
+        return self
+
+    def optimize(self, operations, size):
+        """Optimizes the given ``operations``, which are all in
+        :const:`OPTIMIZABLE_OPERATIONS`, on the image of the given
+        ``size``.  If any of operations has invalid arguments it returns
+        them as they are, so that running them raises the error.
+
+        :param operations: the list of ``(name, args, kwargs)`` triples
+        :type operations: :class:`collections.Sequence`
+        :param size: the ``(width, height)`` pair of the image
+        :type size: :class:`tuple`
+        :returns: the optimized list of ``(name, args, kwargs)`` triples
+        :rtype: :class:`list`
+
+        """
+        optimizer = Optimizer(size)
+        try:
+            for name, _, kwargs in operations:
+                optimizer.push(name, kwargs)
+        except ValueError:
+            return list(operations)
+        return optimizer.operations()
+
+    def apply(self, image):
+        """Runs the recorded operations on the given ``image`` in-place.
+        Unlike :meth:`execute()` it doesn't clone the image.
+
+        :param image: the image to manipulate
+        :type image: :class:`~wand.image.BaseImage`
+
+        """
+        pending = []
+        for operation in self.operations:
+            if optimizable(*operation):
+                pending.append(operation)
+                continue
+            self.run(image, pending)
+            pending = []
+            name, args, kwargs = operation
+            getattr(image, name)(*args, **kwargs)
+        self.run(image, pending)
+        if self.target_format is not None:
+            image.format = self.target_format
+
+    def run(self, image, operations):
+        """Optimizes the given optimizable ``operations`` on the current
+        size of the ``image``, and then runs them.
+
+        """
+        if not operations:
+            return
+        elif not image.animation:
+            operations = self.optimize(operations, image.size)
+        for name, args, kwargs in operations:
+            getattr(image, name)(*args, **kwargs)
+
+    def execute(self):
+        """Runs the recorded operations on a clone of the image.
+
+        :returns: the result image.  its :attr:`~wand.image.BaseImage.format`
+                  is set to the one given to :meth:`format()`
+        :rtype: :class:`~wand.image.Image`
+
+        """
+        image = self.image.clone()
+        try:
+            self.apply(image)
+        except:
+            image.close()
+            raise
+        return image
+
+    def make_blob(self):
+        """Runs the recorded operations, and encodes the result only once.
+
+        :returns: a blob (bytes) string
+        :rtype: :class:`bytes`
+
+        """
+        with self.execute() as image:
+            return image.make_blob()
+
+    def save(self, file=None, filename=None):
+        """Runs the recorded operations, and saves the result into
+        the ``file`` or ``filename``.  Parameters are the same as
+        :meth:`Image.save() <wand.image.Image.save>`'s.
+
+        """
+        with self.execute() as image:
+            image.save(file=file, filename=filename)
+
+
+def optimizable(name, args, kwargs):
+    """Tests whether the given operation can be optimized by
+    :class:`Optimizer`.
+
+    """
+    if name not in OPTIMIZABLE_OPERATIONS or args:
+        return False
+    elif name == 'crop':
+        return kwargs['gravity'] is None and kwargs['reset_coords']
+    return True
+
+
+class Optimizer(object):
+    """The internal state of :meth:`Pipeline.optimize()`.  It keeps
+    the optimized geometry operations as ``[name, params, size]`` lists
+    where ``size`` is the image size before the operation.  It raises
+    :exc:`ValueError` for invalid arguments.
+
+    """
+
+    def __init__(self, size):
+        self.size = tuple(size)
+        self.geometry = []
+        self.stripped = False
+
+    def current_size(self):
+        if not self.geometry:
+            return self.size
+        _, params, _ = self.geometry[-1]
+        return params['width'], params['height']
+
+    def push(self, name, kwargs):
+        if name == 'strip':
+            # stripping profiles commutes with geometry operations,
+            # so it runs only once first.
+            self.stripped = True
+            return
+        width, height = self.current_size()
+        if name == 'crop':
+            box = crop_box(kwargs, width, height)
+            if box != (0, 0, width, height):
+                self.push_crop(box)
+            return
+        params = dict(kwargs)
+        for key, default in (('width', width), ('height', height)):
+            if params[key] is None:
+                params[key] = default
+            elif not (isinstance(params[key], numbers.Integral) and
+                      params[key] > 0):
+                raise ValueError(params[key])
+        if self.geometry and self.geometry[-1][0] == name:
+            # resizing to a size, and then resizing to another size is
+            # just resizing to the last size.
+            width, height = self.geometry.pop()[2]
+        self.geometry.append([name, params, (width, height)])
+
+    def push_crop(self, box):
+        left, top, width, height = box
+        prev = self.geometry[-1] if self.geometry else None
+        if prev is not None and prev[0] == 'crop':
+            self.geometry.pop()
+            self.push_crop((prev[1]['left'] + left, prev[1]['top'] + top,
+                            width, height))
+            return
+        elif prev is not None and prev[0] == 'resize':
+            # (left, top, width, height) mapped onto the image before
+            # resizing, if it's exact.
+            divisors = prev[1]['width'], prev[1]['height']
+            mapped = [n * prev[2][i % 2] for i, n in enumerate(box)]
+            if not any(n % divisors[i % 2] for i, n in enumerate(mapped)):
+                self.geometry.pop()
+                self.push_crop(tuple(n // divisors[i % 2]
+                                     for i, n in enumerate(mapped)))
+                params = dict(prev[1], width=width, height=height)
+                self.geometry.append(['resize', params, self.current_size()])
+                return
+        self.geometry.append([
+            'crop',
+            {'left': left, 'top': top, 'width': width, 'height': height},
+            self.current_size()
+        ])
+
+    def operations(self):
+        operations = [('strip', (), {})] if self.stripped else []
+        operations.extend((name, (), params)
+                          for name, params, _ in self.geometry)
+        return operations
+
+
+def crop_box(kwargs, image_width, image_height):
+    """Resolves the arguments of :meth:`~wand.image.BaseImage.crop()` into
+    the ``(left, top, width, height)`` tuple in the same way.  It raises
+    :exc:`ValueError` if arguments are invalid or out of the image.
+
+    """
+    def abs_(n, m, null=None):
+        if n is None:
+            return m if null is None else null
+        elif not isinstance(n, numbers.Integral) or n > m:
+            raise ValueError(n)
+        return m + n if n < 0 else n
+    right, bottom = kwargs['right'], kwargs['bottom']
+    width, height = kwargs['width'], kwargs['height']
+    if not (right is None or width is None):
+        raise ValueError(right)
+    elif not (bottom is None or height is None):
+        raise ValueError(bottom)
+    left = abs_(kwargs['left'], image_width, 0)
+    top = abs_(kwargs['top'], image_height, 0)
+    if width is None:
+        width = abs_(right, image_width) - left
+    if height is None:
+        height = abs_(bottom, image_height) - top
+    if not (isinstance(width, numbers.Integral) and
+            isinstance(height, numbers.Integral)):
+        raise ValueError((width, height))
+    elif (width < 1 or height < 1 or left < 0 or top < 0 or
+          left + width > image_width or top + height > image_height):
+        raise ValueError((left, top, width, height))
+    return left, top, width, height
@@ -4,9 +4,25 @@
 There is the global resource to manage in MagickWand API. This module
 implements automatic global resource management through reference counting.
 
+It also provides :data:`limits` to limit resources (e.g. memory, disk)
+ImageMagick can use.
+
+.. note::
+
+   The reference counting is thread-safe, so resources can be made and
+   destroyed (also by the garbage collector) on any thread.  Every
+   MagickWand API function is called through :mod:`ctypes` which releases
+   the GIL during the call, so heavy operations like
+   :meth:`~wand.image.BaseImage.resize()` on different images run
+   in parallel on threads.  However an object itself is not thread-safe;
+   don't use the same object on several threads at once.
+
 """
+import collections
 import contextlib
 import ctypes
+import numbers
+import threading
 import warnings
 
 from .api import library
@@ -14,8 +30,30 @@ from .compat import string_type
 from .exceptions import TYPE_MAP, WandException
 
 
-__all__ = ('genesis', 'terminus', 'increment_refcount', 'decrement_refcount',
-           'Resource', 'DestroyedResourceError')
+__all__ = ('RESOURCE_TYPES', 'genesis', 'terminus', 'increment_refcount',
+           'decrement_refcount', 'instantiated', 'limits', 'Resource',
+           'ResourceLimits', 'DestroyedResourceError')
+
+
+#: (:class:`tuple`) The list of resource types which can be limited
+#: through :data:`limits`.
+#:
+#: - ``'undefined'``
+#: - ``'area'``: the maximum number of pixels of an image which can
+#:   reside in the pixel cache memory
+#: - ``'disk'``: the maximum bytes of disk the pixel cache can use
+#: - ``'file'``: the maximum number of open pixel cache files
+#: - ``'map'``: the maximum bytes of memory-mapped pixel cache
+#: - ``'memory'``: the maximum bytes of heap memory the pixel cache can use
+#: - ``'thread'``: the maximum number of threads
+#: - ``'time'``: the maximum seconds a process can run
+#: - ``'throttle'``: the microseconds to sleep between periodic yields
+#: - ``'width'``: the maximum width of an image
+#: - ``'height'``: the maximum height of an image
+#:
+#: .. versionadded:: 0.4.5
+RESOURCE_TYPES = ('undefined', 'area', 'disk', 'file', 'map', 'memory',
+                  'thread', 'time', 'throttle', 'width', 'height')
 
 
 def genesis():
@@ -28,6 +66,9 @@ def genesis():
 
     """
     library.MagickWandGenesis()
+    # MagickWandTerminus() resets the limits, so restore them.
+    for resource, limit in limits.configured.items():
+        library.MagickSetResourceLimit(resource, limit)
 
 
 def terminus():
@@ -52,31 +93,192 @@ def terminus():
 #:
 reference_count = 0
 
+#: (:class:`threading.RLock`) The internal lock that guards
+#: :data:`reference_count`.  It's reentrant since destructors can be
+#: invoked by the garbage collector while the lock is held by the same
+#: thread.
+#:
+#: .. versionadded:: 0.4.5
+reference_count_lock = threading.RLock()
+
 
 def increment_refcount():
     """Increments the :data:`reference_count` and instantiates the MagickWand
     API if it is the first use.
 
+    .. versionchanged:: 0.4.5
+       Became thread-safe.
+
     """
     global reference_count
-    if reference_count:
-        reference_count += 1
-    else:
-        genesis()
-        reference_count = 1
+    with reference_count_lock:
+        if reference_count:
+            reference_count += 1
+        else:
+            genesis()
+            reference_count = 1
 
 
 def decrement_refcount():
     """Decrements the :data:`reference_count` and cleans up the MagickWand
     API if it will be no more used.
 
+    .. versionchanged:: 0.4.5
+       Became thread-safe.
+
     """
     global reference_count
-    if not reference_count:
-        raise RuntimeError('wand.resource.reference_count is already zero')
-    reference_count -= 1
-    if not reference_count:
-        terminus()
+    with reference_count_lock:
+        if not reference_count:
+            raise RuntimeError('wand.resource.reference_count is already '
+                               'zero')
+        reference_count -= 1
+        if not reference_count:
+            terminus()
+
+
+@contextlib.contextmanager
+def instantiated():
+    """Keeps the MagickWand API instantiated inside of the :keyword:`with`
+    block, and prevents other threads from cleaning it up or instantiating
+    it at the same time.  Global functions which don't belong to any
+    resource (e.g. :c:func:`MagickSetResourceLimit`) should be called
+    inside of it.
+
+    .. versionadded:: 0.4.5
+
+    """
+    with reference_count_lock:
+        increment_refcount()
+        try:
+            yield
+        finally:
+            decrement_refcount()
+
+
+class ResourceLimits(collections.MutableMapping):
+    """The mapping of resource types (:const:`RESOURCE_TYPES`) to their
+    limits ImageMagick can use.  Use its only instance :data:`limits`
+    instead of instantiating it::
+
+        from wand.resource import limits
+
+        # A hostile image can't use more than 256 MiB of memory
+        limits['memory'] = 256 * 1024 * 1024
+        limits['width'] = limits['height'] = 16000
+
+    Limits are process-wide.  The limits set through it are kept
+    even if the MagickWand API is cleaned up and instantiated again.
+    Deleting the limit restores it to the default.
+
+    .. versionadded:: 0.4.5
+
+    """
+
+    def __init__(self):
+        #: (:class:`dict`) The internal mapping of the resource type index
+        #: to the limit set through this.
+        self.configured = {}
+        #: (:class:`dict`) The internal mapping of the resource type index
+        #: to the default limit before it was set.
+        self.defaults = {}
+
+    def _resource(self, key):
+        if not isinstance(key, string_type):
+            raise TypeError('resource type must be a string, not ' +
+                            repr(key))
+        elif key == 'undefined' or key not in RESOURCE_TYPES:
+            raise KeyError(key)
+        return RESOURCE_TYPES.index(key)
+
+    def __getitem__(self, key):
+        resource = self._resource(key)
+        with instantiated():
+            return library.MagickGetResourceLimit(resource)
+
+    def __setitem__(self, key, value):
+        resource = self._resource(key)
+        if not isinstance(value, numbers.Integral):
+            raise TypeError('limit must be an integer, not ' + repr(value))
+        elif value < 0:
+            raise ValueError('limit cannot be negative, not ' + repr(value))
+        with instantiated():
+            if resource not in self.defaults:
+                self.defaults[resource] = \
+                    library.MagickGetResourceLimit(resource)
+            if not library.MagickSetResourceLimit(resource, value):
+                raise ValueError('failed to limit {0} to {1!r}; the limit '
+                                 'may not be supported by the ImageMagick '
+                                 'version or be prohibited by the security '
+                                 'policy'.format(key, value))
+            self.configured[resource] = value
+
+    def __delitem__(self, key):
+        resource = self._resource(key)
+        if resource not in self.configured:
+            raise KeyError(key)
+        with instantiated():
+            library.MagickSetResourceLimit(resource, self.defaults[resource])
+            del self.configured[resource]
+
+    def __iter__(self):
+        return iter(RESOURCE_TYPES[1:])
+
+    def __len__(self):
+        return len(RESOURCE_TYPES) - 1
+
+    def usage(self, key):
+        """Gets the amount of the resource currently in use
+        (:c:func:`MagickGetResource`).
+
+        :param key: the resource type.  see :const:`RESOURCE_TYPES`
+        :type key: :class:`basestring`
+        :returns: the amount in use
+        :rtype: :class:`numbers.Integral`
+
+        """
+        resource = self._resource(key)
+        with instantiated():
+            return library.MagickGetResource(resource)
+
+    @contextlib.contextmanager
+    def scope(self, **limits):
+        """Sets the given limits only inside of the :keyword:`with` block,
+        and restores the previous limits after the block::
+
+            with limits.scope(memory=64 * 1024 * 1024, time=10):
+                with Image(blob=untrusted_blob) as img:
+                    img.thumbnail(200, 200)
+
+        :param limits: keyword arguments of resource types
+                       (see :const:`RESOURCE_TYPES`) to their limits
+
+        """
+        previous = {}
+        try:
+            for key, value in limits.items():
+                configured = self.configured.get(self._resource(key))
+                self[key] = value
+                previous[key] = configured
+            yield self
+        finally:
+            for key, value in previous.items():
+                if value is None:
+                    del self[key]
+                else:
+                    self[key] = value
+
+    def __repr__(self):
+        return '<{0}.{1} {2!r}>'.format(
+            type(self).__module__, type(self).__name__, dict(self)
+        )
+
+
+#: (:class:`ResourceLimits`) The global limits of resources ImageMagick
+#: can use.
+#:
+#: .. versionadded:: 0.4.5
+limits = ResourceLimits()
 
 
 class Resource(object):
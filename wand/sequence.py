@@ -124,13 +124,53 @@ class Sequence(ImageProperty, collections.MutableSequence):
         tmp_idx = library.MagickGetIteratorIndex(wand)
         library.MagickSetIteratorIndex(wand, index)
         image = library.GetImageFromMagickWand(wand)
+        library.MagickSetIteratorIndex(wand, tmp_idx)
+        return self.instantiate(index, image)
+
+    def __iter__(self):
+        # Walks the linked list of images only once, instead of seeking
+        # every index from the first image.  The next image is taken
+        # before yielding since the yielded one can be replaced by
+        # the time it's closed.
+        instances = self.instances
+        length = len(self)
+        if len(instances) < length:
+            instances.extend(None for _ in xrange(length - len(instances)))
+        image = libmagick.GetFirstImageInList(
+            library.GetImageFromMagickWand(self.image.wand)
+        )
+        index = 0
+        while image and index < length:
+            next_image = libmagick.GetNextImageInList(image)
+            instance = instances[index]
+            if (instance is None or
+                    getattr(instance, 'c_resource', None) is None):
+                instance = self.instantiate(index, image)
+            yield instance
+            image = next_image
+            index += 1
+
+    def instantiate(self, index, image):
+        """Makes a :class:`SingleImage` of the ``image`` at the ``index``.
+        The ``image`` is cloned alone from the list first, since
+        :c:func:`NewMagickWandFromImage` clones the whole list of
+        the image it's given.  So each frame is still a copy of the image
+        structure rather than a view of the container, but clones share
+        the pixel cache until either of them is changed, so pixels aren't
+        copied until then, and the single image is written back to
+        the container only if it's changed.
+
+        .. note::
+
+           It's only for internal use.
+
+        """
         exc = libmagick.AcquireExceptionInfo()
         single_image = libmagick.CloneImages(image, binary(str(index)), exc)
         libmagick.DestroyExceptionInfo(exc)
         single_wand = library.NewMagickWandFromImage(single_image)
         single_image = libmagick.DestroyImage(single_image)
-        library.MagickSetIteratorIndex(wand, tmp_idx)
-        instance = SingleImage(single_wand, self.image, image)
+        instance = SingleImage(single_wand, self.image, image, index)
         self.instances[index] = instance
         return instance
 
@@ -278,11 +318,13 @@ class SingleImage(BaseImage):
     #: (:class:`wand.image.Image`) The container image.
     container = None
 
-    def __init__(self, wand, container, c_original_resource):
+    def __init__(self, wand, container, c_original_resource, index=None):
         super(SingleImage, self).__init__(wand)
         self.container = container
         self.c_original_resource = c_original_resource
         self._delay = None
+        self._index = index
+        self.pinged = container.pinged
 
     @property
     def sequence(self):
@@ -294,6 +336,14 @@ class SingleImage(BaseImage):
         the :attr:`container` image.
 
         """
+        # The cached index is still valid if the sequence has the single
+        # image at the same position, since frames inserted or deleted
+        # before it also shift the list of instances.
+        index = self._index
+        instances = self.container.sequence.instances
+        if index is not None and index < len(instances) and \
+           instances[index] is self:
+            return index
         wand = self.container.wand
         library.MagickResetIterator(wand)
         image = library.GetImageFromMagickWand(wand)
@@ -303,6 +353,7 @@ class SingleImage(BaseImage):
             i += 1
         assert image
         assert self.c_original_resource == image
+        self._index = i
         return i
 
     @property
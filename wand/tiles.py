@@ -0,0 +1,212 @@
+""":mod:`wand.tiles` --- Tiled processing
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module runs an operation on an image tile by tile, so that
+the operation works on small images which fit in the CPU caches, and
+tiles are processed on multiple threads at once::
+
+    from wand.tiles import process
+
+    def sharpen(tile):
+        tile.unsharp_mask(radius=8, sigma=4, amount=1, threshold=0)
+
+    process('orthophoto.tif', 'sharpened.tif', tile=(1024, 1024),
+            overlap=16, func=sharpen, workers=4)
+
+Each tile is read with margins of ``overlap`` pixels, so that operations
+which look at neighbor pixels, e.g.
+:meth:`~wand.image.BaseImage.gaussian_blur()`,
+:meth:`~wand.image.BaseImage.unsharp_mask()`, make no seams as long as
+their radius doesn't exceed the overlap.  The margins are cropped before
+the tile is written into the output image.
+
+The source image is decoded only once, into a temporary MPC file
+(ImageMagick's own format which stores the raw pixel cache), and then
+each tile is read out of it using the extract syntax e.g.
+``source.mpc[1024x1024+2048+0]``, which maps only the region instead of
+decoding the whole image again.  Only twice as many tiles as workers are
+processed ahead of the output image.
+
+.. note::
+
+   It isn't a streaming pipeline.  Decoding the source for the MPC file
+   takes a full raster, and the output image is a full-size canvas
+   which tiles are composited into before it's saved.  Both are kept in
+   the pixel cache of ImageMagick, which goes to disk only when it
+   exceeds :data:`wand.resource.limits`, so limit ``memory`` and ``map``
+   to process images larger than the memory::
+
+       from wand.resource import limits
+
+       with limits.scope(memory=512 * 1024 * 1024,
+                         map=1024 * 1024 * 1024):
+           process('orthophoto.tif', 'sharpened.tif', func=sharpen)
+
+.. versionadded:: 0.4.5
+
+"""
+import multiprocessing
+import multiprocessing.pool
+import numbers
+import os.path
+import shutil
+import tempfile
+
+from .compat import string_type, text, xrange
+from .image import Image
+
+__all__ = 'process', 'split'
+
+
+def split(size, tile, overlap=0):
+    """Splits the image of the ``size`` into tiles.
+
+    :param size: the ``(width, height)`` pair of the image
+    :type size: :class:`collections.Sequence`
+    :param tile: the ``(width, height)`` pair of each tile.  tiles on
+                 the right and bottom edges can be smaller
+    :type tile: :class:`collections.Sequence`
+    :param overlap: the margin of each tile in pixels.  default is 0
+    :type overlap: :class:`numbers.Integral`
+    :returns: the iterator of ``(box, padded_box)`` pairs.  both are
+              ``(left, top, width, height)`` tuples, and ``padded_box``
+              is ``box`` with margins, which are clipped by the image
+    :rtype: :class:`collections.Iterator`
+
+    """
+    for name, pair in (('size', size), ('tile', tile)):
+        if not (len(pair) == 2 and
+                all(isinstance(v, numbers.Integral) and v > 0
+                    for v in pair)):
+            raise TypeError(name + ' must be a (width, height) pair of '
+                            'natural numbers, not ' + repr(pair))
+    if not isinstance(overlap, numbers.Integral):
+        raise TypeError('overlap must be an integer, not ' + repr(overlap))
+    elif overlap < 0:
+        raise ValueError('overlap cannot be negative, not ' + repr(overlap))
+    width, height = size
+    tile_width, tile_height = tile
+    for top in range(0, height, tile_height):
+        for left in range(0, width, tile_width):
+            box_width = min(tile_width, width - left)
+            box_height = min(tile_height, height - top)
+            padded_left = max(0, left - overlap)
+            padded_top = max(0, top - overlap)
+            padded_right = min(width, left + box_width + overlap)
+            padded_bottom = min(height, top + box_height + overlap)
+            yield ((left, top, box_width, box_height),
+                   (padded_left, padded_top,
+                    padded_right - padded_left, padded_bottom - padded_top))
+
+
+def process(src, dst, tile=(1024, 1024), overlap=16, func=None,
+            workers=None):
+    """Runs ``func`` on every tile of the ``src`` image, and then saves
+    the tiles into the ``dst`` image.
+
+    :param src: the filename of the source image
+    :type src: :class:`basestring`
+    :param dst: the filename to save the result image to.  its format
+                follows the extension
+    :type dst: :class:`basestring`
+    :param tile: the ``(width, height)`` pair of each tile.
+                 default is ``(1024, 1024)``
+    :type tile: :class:`collections.Sequence`
+    :param overlap: the margin of each tile in pixels.  default is 16
+    :type overlap: :class:`numbers.Integral`
+    :param func: the function which manipulates a tile
+                 (:class:`~wand.image.Image`) in-place.  it must not
+                 change the size of the tile.  it's called from multiple
+                 threads at once if ``workers`` is more than 1.
+                 default does nothing, which just converts the format
+    :type func: :class:`collections.Callable`
+    :param workers: the number of threads which read and process tiles.
+                    default is the number of CPUs
+    :type workers: :class:`numbers.Integral`
+
+    """
+    if not isinstance(src, string_type):
+        raise TypeError('src must be a string, not ' + repr(src))
+    elif not isinstance(dst, string_type):
+        raise TypeError('dst must be a string, not ' + repr(dst))
+    elif not (func is None or callable(func)):
+        raise TypeError('func must be callable, not ' + repr(func))
+    with Image.ping(filename=src) as pinged:
+        size = pinged.size
+    boxes = list(split(size, tile, overlap))
+    workers = workers or multiprocessing.cpu_count()
+    temp_dir = tempfile.mkdtemp()
+    try:
+        cache = os.path.join(temp_dir, 'source.mpc')
+        with Image(filename=src) as source:
+            source.save(filename=cache)
+        _process_tiles(cache, dst, size, boxes, func, workers)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _process_tiles(cache, dst, size, boxes, func, workers):
+    """Reads the ``boxes`` out of the ``cache`` MPC file and runs ``func``
+    on them, and then saves them into the ``dst`` image.
+
+    """
+    def run(task):
+        box, (left, top, width, height) = task
+        filename = text(cache) + '[{0}x{1}+{2}+{3}]'.format(
+            width, height, left, top
+        )
+        image = Image(filename=filename)
+        try:
+            if func is not None:
+                func(image)
+                if image.size != (width, height):
+                    raise ValueError(
+                        'func must not change the size of the tile; '
+                        '{0!r} became {1!r}'.format((width, height),
+                                                    image.size)
+                    )
+            image.crop(box[0] - left, box[1] - top,
+                       width=box[2], height=box[3])
+        except:
+            image.close()
+            raise
+        return box, image
+
+    pool = multiprocessing.pool.ThreadPool(workers)
+    # Boxes are submitted in batches, so that processed tiles waiting to
+    # be composited don't pile up in memory when compositing is slower.
+    batch = workers * 2
+    tiles = None
+    try:
+        with Image(width=size[0], height=size[1]) as result:
+            for i in xrange(0, len(boxes), batch):
+                tiles = pool.imap_unordered(run, boxes[i:i + batch])
+                for box, image in tiles:
+                    with image:
+                        result.composite_channel('all_channels', image,
+                                                 'copy', box[0], box[1])
+            result.save(filename=dst)
+    except:
+        if tiles is not None:
+            _close_tiles(tiles)
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+
+def _close_tiles(tiles):
+    """Closes the images of the rest of ``tiles``, which are left when
+    the processing fails.  Failed tiles are skipped.
+
+    """
+    while True:
+        try:
+            _, image = next(tiles)
+        except StopIteration:
+            break
+        except Exception:
+            continue
+        image.close()
@@ -51,7 +51,8 @@ from .compat import binary, string_type, text
 __all__ = ('VERSION', 'VERSION_INFO', 'MAGICK_VERSION',
            'MAGICK_VERSION_INFO', 'MAGICK_VERSION_NUMBER',
            'MAGICK_RELEASE_DATE', 'MAGICK_RELEASE_DATE_STRING',
-           'QUANTUM_DEPTH', 'configure_options', 'fonts', 'formats')
+           'QUANTUM_DEPTH', 'QUANTUM_RANGE', 'configure_options', 'fonts',
+           'formats')
 
 #: (:class:`tuple`) The version tuple e.g. ``(0, 1, 2)``.
 #:
@@ -117,7 +118,16 @@ if libmagick:
     #: .. versionadded:: 0.3.0
     QUANTUM_DEPTH = c_quantum_depth.value
 
-    del c_magick_version, _match, c_quantum_depth
+    c_quantum_range = ctypes.c_size_t()
+    library.MagickGetQuantumRange(ctypes.byref(c_quantum_range))
+    #: (:class:`numbers.Integral`) The maximum value of a quantum
+    #: e.g. 65535 for :const:`QUANTUM_DEPTH` 16.  Equivalent to
+    #: :c:macro:`QuantumRange` of the linked ImageMagick library.
+    #:
+    #: .. versionadded:: 0.4.5
+    QUANTUM_RANGE = c_quantum_range.value
+
+    del c_magick_version, _match, c_quantum_depth, c_quantum_range
 
 
 def configure_options(pattern='*'):